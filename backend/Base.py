@@ -9,7 +9,7 @@ use SQLAlchemy ORM (declarative) with a compatible engine.
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, ForeignKey, Table,
-    TIMESTAMP, Float, Boolean, UniqueConstraint
+    TIMESTAMP, Float, Boolean, UniqueConstraint, JSON
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -161,6 +161,7 @@ class Lesson(Base):
     description = Column(Text, nullable=True)
     content_url = Column(String, nullable=True)
     content_type = Column(String(50), default="video")
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the uploaded file
     language = Column(String(10), default="en")
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -178,11 +179,18 @@ class LessonSubtitle(Base):
     subtitle_text = Column(Text, nullable=False)
     language = Column(String(10), nullable=False)
     status = Column(String(20), nullable=False, default="generated")
+    progress = Column(Integer, nullable=True, default=0)  # 0-100 while a job is running
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     subtitle_url = Column(String, nullable=True)
+    source_hash = Column(String(64), nullable=True)  # Lesson.content_hash this subtitle was generated from
 
     lesson = relationship("Lesson", back_populates="subtitles")
 
+    # One row per lesson and language (a new job updates it in place)
+    __table_args__ = (
+        UniqueConstraint("lesson_id", "language", name="_lesson_subtitle_language_uc"),
+    )
+
 # Material
 class Material(Base):
     __tablename__ = "materials"
@@ -233,6 +241,9 @@ class Submission(Base):
     # ✅ AI grading fields
     ai_score = Column(Integer, nullable=True)
     ai_feedback = Column(Text, nullable=True)   # <-- Add this field to fix the error
+    ai_status = Column(String(20), nullable=True, index=True)  # pending / grading / graded / failed
+    ai_latency_ms = Column(Integer, nullable=True)  # model time incl. retries / rate-limit waits
+    ai_claimed_at = Column(DateTime, nullable=True)  # when a grading worker claimed it (lease start)
 
     # ✅ Mentor override fields
     mentor_score = Column(Integer, nullable=True)
@@ -296,6 +307,16 @@ class LearnerProgress(Base):
     learner = relationship("User", back_populates="progress")
     course = relationship("Course", back_populates="progress")
 
+class LearnerProgressHistory(Base):
+    """Append-only log of progress updates (LearnerProgress keeps only the latest value)."""
+    __tablename__ = "learner_progress_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    learner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"))
+    progress_percent = Column(Float, default=0.0)
+    recorded_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
 class LearnerEngagement(Base):
     __tablename__ = "learner_engagement"
 
@@ -413,6 +434,57 @@ class MentorAssignment(Base):
 #     quiz = relationship("Quiz")
 #     user = relationship("User")
 
+# --------------------------
+# TRANSLATION MEMORY
+# --------------------------
+class TranslationMemory(Base):
+    __tablename__ = "translation_memory"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_hash = Column(String(64), nullable=False)  # sha256 of the normalized source text
+    source_lang = Column(String(10), nullable=False)
+    target_lang = Column(String(10), nullable=False)
+    source_text = Column(Text, nullable=False)
+    translated_text = Column(Text, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("source_hash", "source_lang", "target_lang", name="_translation_memory_uc"),
+    )
+
+# --------------------------
+# GRADING CACHE
+# --------------------------
+class GradingCache(Base):
+    __tablename__ = "grading_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the normalized extracted text
+    assignment_id = Column(Integer, nullable=False)    # 0 when graded without an assignment
+    prompt_version = Column(String(20), nullable=False)
+    model = Column(String(50), nullable=False)
+    ai_score = Column(Integer, nullable=False)
+    ai_feedback = Column(Text, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("content_hash", "assignment_id", "prompt_version", "model", name="_grading_cache_uc"),
+    )
+
+# --------------------------
+# DASHBOARD SNAPSHOTS
+# --------------------------
+class DashboardSnapshot(Base):
+    __tablename__ = "dashboard_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    section = Column(String(50), unique=True, index=True, nullable=False)  # 'students', 'courses', ...
+    payload = Column(JSON, nullable=True)  # pre-built response for the section
+    is_stale = Column(Boolean, default=True)
+    refreshed_at = Column(DateTime, nullable=True)
+
 # --------------------------
 # AGGREGATED ANALYTICS (OPTIONAL)
 # --------------------------
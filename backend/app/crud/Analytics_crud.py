@@ -1,9 +1,12 @@
 # methods.py
+from sqlalchemy import func, case
 from sqlalchemy.orm import Session
-from Base import  Course, LearnerProgress, LearnerEngagement, MentorInteractionLog,User
+from Base import  Course, LearnerProgress, LearnerProgressHistory, LearnerEngagement, MentorInteractionLog,User, UserRole, PublishStatusEnum
 from basemodels import LearnerProgressBase, LearnerEngagementBase, MentorInteractionBase, CourseBase
 from fastapi import HTTPException
-from datetime import datetime, timezone
+from app.crud.dashboard_crud import mark_dashboard_stale
+from datetime import datetime, timezone, timedelta
+from typing import Optional
 
 
 # # Learner CRUD
@@ -52,6 +55,15 @@ def update_progress(db: Session, progress_data: LearnerProgressBase):
         progress = LearnerProgress(**progress_data.model_dump())
         db.add(progress)
 
+    # Keep every value so the monthly insights chart can be rebuilt later
+    db.add(LearnerProgressHistory(
+        learner_id=progress_data.learner_id,
+        course_id=progress_data.course_id,
+        progress_percent=progress_data.progress_percent,
+        recorded_at=datetime.utcnow(),
+    ))
+
+    mark_dashboard_stale(db, "insights")
     db.commit()
     db.refresh(progress)
     return progress
@@ -81,6 +93,156 @@ def fetch_course_report(db: Session, course_id: int):
     return progress_list
 
 
+# =========================================================
+# 👩‍🎓 Student Analytics (Progress + Engagement)
+# =========================================================
+STUDENT_STATUSES = ("Active", "Inactive", "At Risk")
+
+
+def fetch_student_analytics(
+    db: Session,
+    status: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Progress, last login and Active/Inactive/At Risk status for every learner
+    in one aggregated query. Supports keyset pagination on the learner id
+    (`after_id` + `limit`) and filtering by status in the database.
+    """
+    progress_sq = (
+        db.query(
+            LearnerProgress.learner_id.label("learner_id"),
+            func.avg(LearnerProgress.progress_percent).label("progress"),
+        )
+        .group_by(LearnerProgress.learner_id)
+        .subquery()
+    )
+    engagement_sq = (
+        db.query(
+            LearnerEngagement.learner_id.label("learner_id"),
+            func.max(LearnerEngagement.last_login).label("last_login"),
+        )
+        .group_by(LearnerEngagement.learner_id)
+        .subquery()
+    )
+
+    progress = func.coalesce(progress_sq.c.progress, 0.0)
+    active_since = datetime.utcnow() - timedelta(days=14)
+    status_col = case(
+        (progress < 50, "At Risk"),
+        (engagement_sq.c.last_login > active_since, "Active"),
+        else_="Inactive",
+    )
+
+    query = (
+        db.query(
+            User.id,
+            User.first_name,
+            User.last_name,
+            User.email,
+            progress.label("progress"),
+            func.to_char(engagement_sq.c.last_login, "Mon DD, YYYY").label("last_active"),
+            status_col.label("status"),
+        )
+        .outerjoin(progress_sq, progress_sq.c.learner_id == User.id)
+        .outerjoin(engagement_sq, engagement_sq.c.learner_id == User.id)
+        .filter(User.role == UserRole.student)
+    )
+
+    if status:
+        query = query.filter(status_col == status)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+
+    query = query.order_by(User.id)
+    if limit:
+        query = query.limit(limit)
+
+    return [
+        {
+            "id": r.id,
+            "name": f"{r.first_name} {r.last_name or ''}".strip(),
+            "email": r.email,
+            "progress": round(float(r.progress), 2),
+            "status": r.status,  # Must exactly match "At Risk" etc.
+            "lastActive": r.last_active or "N/A",
+        }
+        for r in query.all()
+    ]
+
+
+# =========================================================
+# 📚 Course Analytics (grouped per course)
+# =========================================================
+def fetch_courses_analytics(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """
+    Per-course learner count, average progress and activity breakdown
+    computed with one GROUP BY course_id and conditional aggregates.
+    `start_date` / `end_date` restrict the progress rows by `updated_at`.
+    """
+    progress_q = db.query(
+        LearnerProgress.course_id.label("course_id"),
+        func.count(LearnerProgress.id).label("total"),
+        func.avg(LearnerProgress.progress_percent).label("avg_progress"),
+        func.count(LearnerProgress.id).filter(LearnerProgress.progress_percent >= 90).label("completed"),
+        func.count(LearnerProgress.id).filter(
+            LearnerProgress.progress_percent > 0, LearnerProgress.progress_percent < 90
+        ).label("in_progress"),
+    )
+    if start_date:
+        progress_q = progress_q.filter(LearnerProgress.updated_at >= start_date)
+    if end_date:
+        progress_q = progress_q.filter(LearnerProgress.updated_at <= end_date)
+    stats_sq = progress_q.group_by(LearnerProgress.course_id).subquery()
+
+    rows = (
+        db.query(
+            Course.title,
+            Course.description,
+            Course.publish_status,
+            func.to_char(Course.created_at, "Mon DD, YYYY").label("created_at"),
+            func.coalesce(stats_sq.c.total, 0).label("total"),
+            func.coalesce(stats_sq.c.avg_progress, 0.0).label("avg_progress"),
+            func.coalesce(stats_sq.c.completed, 0).label("completed"),
+            func.coalesce(stats_sq.c.in_progress, 0).label("in_progress"),
+        )
+        .outerjoin(stats_sq, stats_sq.c.course_id == Course.id)
+        .order_by(Course.id)
+        .all()
+    )
+
+    result = []
+    for r in rows:
+        avg_progress = round(float(r.avg_progress), 2)
+
+        # Determine course status
+        status = "Published" if r.publish_status == PublishStatusEnum.published else "Unpublished"
+        risk_status = "At Risk" if avg_progress < 50 else status
+
+        result.append({
+            "title": r.title,
+            "description": r.description or "",
+            "createdAt": r.created_at or "N/A",
+            "stats": {
+                "totalStudents": r.total,
+                "avgProgress": avg_progress,
+                "status": risk_status
+            },
+            "activity": [
+                {"name": "Completed", "value": r.completed},
+                {"name": "In Progress", "value": r.in_progress},
+                {"name": "Not Started", "value": r.total - (r.completed + r.in_progress)},
+            ]
+        })
+
+    return result
+
+
 # =========================================================
 # 🕒 Engagement CRUD
 # =========================================================
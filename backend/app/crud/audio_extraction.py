@@ -0,0 +1,121 @@
+import os
+import subprocess
+import tempfile
+from datetime import timedelta
+from dotenv import load_dotenv
+from minio import Minio
+
+load_dotenv()
+
+# ==============================================================
+# 🔊 Audio Extraction for Transcription
+# ==============================================================
+# Whisper only needs a mono 16 kHz audio track, so instead of downloading
+# the whole video container we let ffmpeg read the MinIO object over HTTP
+# (range requests through a presigned URL) and decode just the audio to
+# stdout, which is handed on piece by piece. Nothing is written to disk
+# and the video bytes are never held in memory.
+#
+#   FFMPEG_BIN                 ffmpeg executable
+#   AUDIO_URL_EXPIRY_SECONDS   lifetime of the presigned URL handed to ffmpeg
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+AUDIO_URL_EXPIRY_SECONDS = int(os.getenv("AUDIO_URL_EXPIRY_SECONDS", "3600"))
+
+# Whisper's expected input format
+AUDIO_SAMPLE_RATE = 16000
+
+# Bytes read from ffmpeg's stdout at a time
+AUDIO_READ_CHUNK = 1024 * 1024
+
+
+def media_source(file_path: str) -> str:
+    """
+    Return something ffmpeg can open for a lesson file: a presigned MinIO
+    URL for stored objects, or the path itself for local files.
+    """
+    if not (file_path.startswith("http://") or file_path.startswith("https://")):
+        return file_path
+
+    MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT")
+    MINIO_BUCKET = os.getenv("MINIO_COURSES_BUCKET")
+
+    client = Minio(
+        MINIO_ENDPOINT.replace("http://", "").replace("https://", ""),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=MINIO_ENDPOINT.startswith("https")
+    )
+    object_name = file_path.split(f"{MINIO_BUCKET}/")[-1]
+    return client.presigned_get_object(
+        MINIO_BUCKET, object_name, expires=timedelta(seconds=AUDIO_URL_EXPIRY_SECONDS)
+    )
+
+
+def _ffmpeg_command(source: str, sample_rate: int, start: float = None, duration: float = None) -> list:
+    cmd = [FFMPEG_BIN, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if source.startswith("http://") or source.startswith("https://"):
+        # Survive dropped connections on long downloads
+        cmd += ["-reconnect", "1", "-reconnect_on_network_error", "1", "-reconnect_delay_max", "5"]
+    if start:
+        # Input seeking: only the requested range is fetched and decoded
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", source]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += [
+        "-vn", "-sn", "-dn",          # audio only
+        "-ac", "1",                   # mono
+        "-ar", str(sample_rate),      # 16 kHz
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-",
+    ]
+    return cmd
+
+
+def stream_audio(source: str, sample_rate: int = AUDIO_SAMPLE_RATE, start: float = None, duration: float = None):
+    """
+    Decode the audio track of `source` (URL or path) and yield it as mono
+    float32 numpy arrays at `sample_rate`, one piece per read from ffmpeg,
+    so the consumer never has to hold the whole track. `start` / `duration`
+    (seconds) limit decoding to one range of the track.
+
+    ffmpeg's stderr goes to a temporary file (not a pipe), so a chatty
+    decoder can never block on a full pipe while we only read stdout.
+    """
+    import numpy as np
+
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(_ffmpeg_command(source, sample_rate, start, duration), stdout=subprocess.PIPE, stderr=stderr)
+        leftover = b""
+        try:
+            for chunk in iter(lambda: process.stdout.read(AUDIO_READ_CHUNK), b""):
+                # 16-bit samples: keep an odd trailing byte for the next read
+                chunk = leftover + chunk
+                usable = len(chunk) - len(chunk) % 2
+                leftover = chunk[usable:]
+                if usable:
+                    yield np.frombuffer(chunk[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+
+            if process.wait() != 0:
+                stderr.seek(0)
+                message = stderr.read()[-4000:].decode(errors="ignore").strip()
+                raise RuntimeError(f"ffmpeg failed to extract audio: {message}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+
+def extract_audio(source: str, sample_rate: int = AUDIO_SAMPLE_RATE, start: float = None, duration: float = None):
+    """
+    Decode the audio track of `source` (or one range of it) into a single
+    mono float32 numpy array, for callers that need it at once.
+    """
+    import numpy as np
+
+    pieces = list(stream_audio(source, sample_rate, start, duration))
+    audio = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+    print(f"🔊 Extracted {len(audio) / sample_rate:.0f}s of audio")
+    return audio
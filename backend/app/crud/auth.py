@@ -7,8 +7,6 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import jwt
-import firebase_admin
-from firebase_admin import auth as firebase_auth, credentials
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -25,7 +23,10 @@ FIREBASE_PROVIDER = os.getenv("AUTH_PROVIDER", "LOCAL").upper()  # LOCAL or FIRE
 FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", None)
 
 if FIREBASE_PROVIDER == "FIREBASE":
-    
+    # Imported only when Firebase auth is enabled (heavy SDK)
+    import firebase_admin
+    from firebase_admin import credentials
+
     cred_path = os.getenv("FIREBASE_CRED_PATH")
     if not firebase_admin._apps:
         if cred_path:
@@ -1,6 +1,3 @@
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
 from io import BytesIO
 from datetime import datetime
 from minio import Minio
@@ -33,7 +30,11 @@ def generate_certificate(student_name: str, course_name: str):
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     filename = f"certificate_{student_name.replace(' ', '_')}_{timestamp}.pdf"
 
-    # 🧾 Create PDF
+    # 🧾 Create PDF (reportlab is imported lazily — only certificate paths need it)
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+
     buffer = BytesIO()
     pdf = canvas.Canvas(buffer, pagesize=A4)
     width, height = A4
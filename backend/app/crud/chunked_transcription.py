@@ -0,0 +1,145 @@
+import os
+from dotenv import load_dotenv
+from app.crud.whisper_models import get_whisper_model
+from app.crud.audio_extraction import AUDIO_SAMPLE_RATE, stream_audio, extract_audio, media_source
+
+load_dotenv()
+
+# ==============================================================
+# ✂️ Chunked, Parallel Transcription
+# ==============================================================
+# Long lessons are cut into chunks at the quietest point near each chunk
+# boundary, transcribed as separate jobs on the transcription pool (one
+# Whisper model per pool process, no nested pools) and stitched back into
+# a single timeline. Chunks overlap slightly so a word on a boundary is
+# never lost; each segment is kept only by the chunk whose core contains
+# its midpoint.
+#
+#   1. plan_chunks       streams the audio once and picks the cut points
+#                        (short audio is transcribed right there)
+#   2. transcribe_chunk  decodes only its own time range and transcribes it
+#   3. stitch_chunks     joins the chunk results in order
+#
+#   TRANSCRIPTION_CHUNK_SECONDS   target chunk length (audio shorter than 1.5x is not split)
+#   TRANSCRIPTION_CHUNK_OVERLAP   seconds of audio shared with each neighbour
+#   TRANSCRIPTION_SILENCE_WINDOW  how far (seconds) to search for silence around a boundary
+
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", "600"))
+TRANSCRIPTION_CHUNK_OVERLAP = float(os.getenv("TRANSCRIPTION_CHUNK_OVERLAP", "1.0"))
+TRANSCRIPTION_SILENCE_WINDOW = float(os.getenv("TRANSCRIPTION_SILENCE_WINDOW", "30"))
+
+# Energy is measured over frames of this length when looking for silence
+SILENCE_FRAME_SECONDS = 0.5
+
+
+def _quietest_point(audio, start: int, end: int) -> int:
+    """Sample index of the lowest-energy frame within audio[start:end]."""
+    import numpy as np
+
+    frame = int(SILENCE_FRAME_SECONDS * AUDIO_SAMPLE_RATE)
+    window = audio[start:end]
+    count = len(window) // frame
+    if count == 0:
+        return (start + end) // 2
+    energy = np.square(window[:count * frame].reshape(count, frame)).mean(axis=1)
+    quietest = int(np.argmin(energy))
+    return start + quietest * frame + frame // 2
+
+
+def find_cuts(pieces) -> tuple:
+    """
+    Consume audio pieces (e.g. from `stream_audio`) and return
+    (cut sample indexes, total samples, audio). Each cut sits at the
+    quietest point within TRANSCRIPTION_SILENCE_WINDOW of the nominal
+    chunk length after the previous cut.
+
+    Only the audio since the last cut is buffered (at most ~1.5 chunks);
+    `audio` is the whole track when it needed no cut, otherwise None.
+    """
+    import numpy as np
+
+    chunk = int(TRANSCRIPTION_CHUNK_SECONDS * AUDIO_SAMPLE_RATE)
+    search = int(TRANSCRIPTION_SILENCE_WINDOW * AUDIO_SAMPLE_RATE)
+    # Cut only once we know more than 1.5 chunks remain and the whole search window is buffered
+    needed = max(int(chunk * 1.5) + 1, chunk + search + 1)
+
+    cuts = []
+    buffered = []
+    size = 0
+    offset = 0  # absolute sample index of the first buffered sample
+    for piece in pieces:
+        buffered.append(piece)
+        size += len(piece)
+        while chunk > 0 and size >= needed:
+            audio = np.concatenate(buffered)
+            cut = _quietest_point(audio, max(chunk - search, 1), min(chunk + search, len(audio) - 1))
+            cuts.append(offset + cut)
+            offset += cut
+            buffered = [audio[cut:]]
+            size = len(audio) - cut
+
+    total = offset + size
+    if cuts:
+        return cuts, total, None
+    audio = np.concatenate(buffered) if buffered else np.zeros(0, dtype=np.float32)
+    return cuts, total, audio
+
+
+def plan_chunks(file_path: str) -> dict:
+    """
+    Stream the lesson audio once (runs in a transcription pool process).
+    Returns {"segments": [...]} when the audio is short enough to be
+    transcribed right away, else {"chunks": [(start, end, core_start,
+    core_end), ...]} in seconds, ready for `transcribe_chunk`.
+    """
+    cuts, total, audio = find_cuts(stream_audio(media_source(file_path)))
+    if audio is not None:
+        print(f"🔊 Transcribing {total / AUDIO_SAMPLE_RATE:.0f}s of audio in one piece")
+        return {"segments": get_whisper_model().transcribe(audio, language="en").get("segments", [])}
+
+    overlap = int(TRANSCRIPTION_CHUNK_OVERLAP * AUDIO_SAMPLE_RATE)
+    bounds = list(zip([0] + cuts, cuts + [total]))
+    chunks = []
+    for i, (core_start, core_end) in enumerate(bounds):
+        chunks.append((
+            max(core_start - overlap, 0) / AUDIO_SAMPLE_RATE,
+            min(core_end + overlap, total) / AUDIO_SAMPLE_RATE,
+            core_start / AUDIO_SAMPLE_RATE if i > 0 else float("-inf"),
+            core_end / AUDIO_SAMPLE_RATE if i < len(bounds) - 1 else float("inf"),
+        ))
+    print(f"✂️ Transcribing {total / AUDIO_SAMPLE_RATE:.0f}s of audio in {len(chunks)} chunks")
+    return {"chunks": chunks}
+
+
+def transcribe_chunk(file_path: str, start: float, end: float, core_start: float, core_end: float) -> list:
+    """
+    Transcribe one chunk (runs in a transcription pool process). Only
+    [start, end) of the audio is decoded; timestamps are shifted back onto
+    the lesson timeline and only segments centred inside
+    [core_start, core_end) are returned.
+    """
+    audio = extract_audio(media_source(file_path), start=start, duration=end - start)
+    result = get_whisper_model().transcribe(audio, language="en")
+    segments = []
+    for seg in result.get("segments", []):
+        seg_start = seg["start"] + start
+        seg_end = seg["end"] + start
+        if core_start <= (seg_start + seg_end) / 2 < core_end:
+            segments.append({"start": seg_start, "end": seg_end, "text": seg["text"]})
+    return segments
+
+
+def stitch_chunks(chunk_segments: list) -> list:
+    """
+    Join per-chunk segment lists (in chunk order) into Whisper-style
+    segments ({"id", "start", "end", "text"}) on one continuous timeline.
+    """
+    segments = []
+    for chunk in chunk_segments:
+        for seg in chunk:
+            if segments and seg["start"] < segments[-1]["end"]:
+                seg["start"] = min(segments[-1]["end"], seg["end"])
+            seg["id"] = len(segments)
+            segments.append(seg)
+    return segments
+
@@ -5,6 +5,7 @@ from typing import Dict
 from basemodels import CourseBase, CourseUpdate
 from Base import Course, PublishStatusEnum, Module,  User
 from database import get_db
+from app.crud.dashboard_crud import mark_dashboard_stale
 from minio import Minio
 import uuid
 import io
@@ -135,6 +136,7 @@ def create_course(
         )
 
         db.add(db_course)
+        mark_dashboard_stale(db, "courses", "insights")
         db.commit()
         db.refresh(db_course)
 
@@ -212,6 +214,7 @@ def update_course(db: Session, course_id: int, course_data: CourseUpdate, banner
     db_course.updated_at = datetime.now(timezone.utc)
 
     try:
+        mark_dashboard_stale(db, "courses", "evaluations", "insights")
         db.commit()
         db.refresh(db_course)
         return {
@@ -245,6 +248,7 @@ def delete_course(course_id: int, db: Session = Depends(get_db)) -> Dict:
         raise HTTPException(status_code=404, detail=f"Course with ID {course_id} not found")
 
     db.delete(db_course)
+    mark_dashboard_stale(db)
     db.commit()
     return {"message": f"Course with ID {course_id} deleted successfully"}
 
@@ -368,6 +372,7 @@ def update_course_status(db: Session, course_id: int, new_status: PublishStatusE
         raise HTTPException(status_code=404, detail=f"Course with ID {course_id} not found")
 
     course.publish_status = new_status.value
+    mark_dashboard_stale(db, "courses", "insights")
     db.commit()
     db.refresh(course)
 
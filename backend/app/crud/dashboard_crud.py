@@ -0,0 +1,426 @@
+import os
+from datetime import datetime
+from sqlalchemy import func, event, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from Base import (
+    Course, User, UserRole, Submission, Assignment, LearnerProgress, LearnerProgressHistory,
+    PublishStatusEnum, DashboardSnapshot, course_enrollments
+)
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Snapshots older than this are rebuilt even if no write marked them stale
+# (safety net for writes that bypass the crud helpers).
+DASHBOARD_SNAPSHOT_MAX_AGE = int(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE", "300"))
+
+# Insights progress chart: number of months and the most learners ever stored.
+DASHBOARD_INSIGHTS_MONTHS = int(os.getenv("DASHBOARD_INSIGHTS_MONTHS", "6"))
+DASHBOARD_INSIGHTS_MAX_LEARNERS = int(os.getenv("DASHBOARD_INSIGHTS_MAX_LEARNERS", "50"))
+
+
+# =========================================================
+# 👩‍🎓 Students (with enrollment counts)
+# =========================================================
+def get_student_rows(db: Session):
+    """
+    Return every student with the number of courses they are enrolled in.
+    One grouped query instead of loading `enrolled_courses` per student.
+    """
+    rows = (
+        db.query(
+            User.id,
+            User.first_name,
+            User.last_name,
+            User.email,
+            func.count(course_enrollments.c.course_id).label("courses_enrolled"),
+        )
+        .outerjoin(course_enrollments, course_enrollments.c.student_id == User.id)
+        .filter(User.role == UserRole.student)
+        .group_by(User.id)
+        .order_by(User.id)
+        .all()
+    )
+
+    return [
+        {
+            "id": r.id,
+            "name": f"{r.first_name} {r.last_name or ''}".strip(),
+            "email": r.email,
+            "coursesEnrolled": r.courses_enrolled,
+            "progress": 0,
+            "lastActivity": None,
+        }
+        for r in rows
+    ]
+
+
+# =========================================================
+# 📚 Published Courses (with student counts)
+# =========================================================
+def get_course_rows(db: Session):
+    """
+    Return every published course with its number of enrolled students.
+    One grouped query instead of loading `students` per course.
+    """
+    rows = (
+        db.query(
+            Course.id,
+            Course.title,
+            Course.banner_url,
+            func.count(course_enrollments.c.student_id).label("students"),
+        )
+        .outerjoin(course_enrollments, course_enrollments.c.course_id == Course.id)
+        .filter(Course.publish_status == PublishStatusEnum.published)
+        .group_by(Course.id)
+        .order_by(Course.id)
+        .all()
+    )
+
+    return [
+        {
+            "id": r.id,
+            "title": r.title,
+            "image": r.banner_url or "/placeholder.png",
+            "students": r.students,
+            "progress": 0,
+        }
+        for r in rows
+    ]
+
+
+# =========================================================
+# 📝 Pending Evaluations
+# =========================================================
+def get_pending_evaluation_rows(db: Session):
+    """
+    Return all submissions still waiting for a mentor score, together with
+    the student name, assignment and course title, in a single joined query.
+    """
+    rows = (
+        db.query(
+            Submission.id,
+            User.first_name,
+            User.last_name,
+            Assignment.title.label("assignment_title"),
+            Course.title.label("course_title"),
+        )
+        .join(User, User.id == Submission.student_id)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .join(Course, Course.id == Assignment.course_id)
+        .filter(Submission.mentor_score.is_(None))
+        .order_by(Submission.id)
+        .all()
+    )
+
+    return [
+        {
+            "id": r.id,
+            "studentName": f"{r.first_name} {r.last_name or ''}".strip(),
+            "course": r.course_title,
+            "assignment": r.assignment_title,
+            "status": "Pending",
+        }
+        for r in rows
+    ]
+
+
+# =========================================================
+# 📈 Insights (progress + engagement)
+# =========================================================
+def _month_starts(count: int, now: datetime):
+    """Return the first day of the last `count` calendar months, oldest first."""
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(count):
+        starts.append(datetime(year, month, 1))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return starts[::-1]
+
+
+def _next_month(start: datetime) -> datetime:
+    """First day of the month after `start`."""
+    if start.month == 12:
+        return datetime(start.year + 1, 1, 1)
+    return datetime(start.year, start.month + 1, 1)
+
+
+def _carry_forward_average(courses: dict, month_starts: list) -> list:
+    """
+    {course_id: [(time, value), ...]} -> one value per month: the average of
+    each course's latest value recorded before the month ends.
+    """
+    timelines = [sorted(p, key=lambda point: point[0]) for p in courses.values()]
+    latest = [None] * len(timelines)
+    positions = [0] * len(timelines)
+
+    series = []
+    for start in month_starts:
+        end = _next_month(start)
+        for c, timeline in enumerate(timelines):
+            while positions[c] < len(timeline) and timeline[positions[c]][0] < end:
+                latest[c] = timeline[positions[c]][1] or 0.0
+                positions[c] += 1
+        known = [v for v in latest if v is not None]
+        series.append(round(sum(known) / len(known), 2) if known else 0.0)
+    return series
+
+
+def _month_bucket(db: Session, column, floor: datetime):
+    """SQL month start of `column`; values before `floor` (a month start) land in floor's month."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("month", func.greatest(column, floor))
+    # Portable fallback (SQLite, used by the tests): ISO text, parsed by _as_datetime
+    return func.strftime("%Y-%m-01 00:00:00", func.max(column, floor))
+
+
+def _as_datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _monthly_history(db: Session, learner_ids: list, window_start: datetime, window_end: datetime):
+    """
+    Rows (learner_id, course_id, month, progress_percent): the latest history
+    value per learner, course and month of the window. Only one row per
+    course is returned for everything before the window.
+    """
+    h = LearnerProgressHistory
+    month = _month_bucket(db, h.recorded_at, window_start).label("month")
+    criteria = (h.learner_id.in_(learner_ids), h.recorded_at < window_end)
+
+    if db.get_bind().dialect.name == "postgresql":
+        return (
+            db.query(h.learner_id, h.course_id, month, h.progress_percent)
+            .filter(*criteria)
+            .distinct(h.learner_id, h.course_id, month)
+            .order_by(h.learner_id, h.course_id, month, h.recorded_at.desc(), h.id.desc())
+            .all()
+        )
+
+    ranked = (
+        db.query(
+            h.learner_id, h.course_id, month, h.progress_percent,
+            func.row_number().over(
+                partition_by=(h.learner_id, h.course_id, month),
+                order_by=(h.recorded_at.desc(), h.id.desc()),
+            ).label("rank"),
+        )
+        .filter(*criteria)
+        .subquery()
+    )
+    return (
+        db.query(ranked.c.learner_id, ranked.c.course_id, ranked.c.month, ranked.c.progress_percent)
+        .filter(ranked.c.rank == 1)
+        .all()
+    )
+
+
+def get_progress_series(db: Session, top: int = DASHBOARD_INSIGHTS_MAX_LEARNERS,
+                        months: int = DASHBOARD_INSIGHTS_MONTHS):
+    """
+    Monthly progress series for the top-N learners, as a columnar payload:
+    {"months": [...], "learners": [{id, key, name}], "progress": [[...], ...]}
+
+    Progress is rebuilt from LearnerProgressHistory: for every month, each
+    course contributes the latest value recorded by the end of that month
+    (carried forward), and the learner's value is the average over those
+    courses. Courses without history (rows written before it was recorded)
+    count from their `updated_at`. Months before the first update are 0.
+    """
+    month_starts = _month_starts(months, datetime.utcnow())
+    window_end = _next_month(month_starts[-1]) if month_starts else datetime.utcnow()
+
+    # 🏆 Top-N learners by average progress (one grouped query)
+    top_learners = (
+        db.query(
+            User.id,
+            User.first_name,
+            User.last_name,
+            func.avg(LearnerProgress.progress_percent).label("avg_progress"),
+        )
+        .join(LearnerProgress, LearnerProgress.learner_id == User.id)
+        .filter(User.role == UserRole.student)
+        .group_by(User.id)
+        .order_by(func.avg(LearnerProgress.progress_percent).desc(), User.id)
+        .limit(top)
+        .all()
+    )
+    learner_ids = [l.id for l in top_learners]
+
+    # 📅 Progress points (learner, course, month, value) for those learners only:
+    # the last value per course and month, where everything recorded before
+    # the window falls into its first month (i.e. the carried-in value)
+    points = {}
+    if learner_ids and month_starts:
+        for r in _monthly_history(db, learner_ids, month_starts[0], window_end):
+            points.setdefault(r.learner_id, {}).setdefault(r.course_id, []).append(
+                (_as_datetime(r.month), r.progress_percent)
+            )
+
+        current = (
+            db.query(
+                LearnerProgress.learner_id,
+                LearnerProgress.course_id,
+                LearnerProgress.updated_at,
+                LearnerProgress.progress_percent,
+            )
+            .filter(LearnerProgress.learner_id.in_(learner_ids))
+            .all()
+        )
+        for r in current:
+            courses = points.setdefault(r.learner_id, {})
+            if r.course_id not in courses and r.updated_at is not None and r.updated_at < window_end:
+                courses[r.course_id] = [(r.updated_at, r.progress_percent)]
+
+    learners = []
+    progress = []
+    used_keys = set()
+    for l in top_learners:
+        # Use first name as graph key (suffixed with the id on collisions)
+        key = (l.first_name or "").lower()
+        if key in used_keys:
+            key = f"{key}_{l.id}"
+        used_keys.add(key)
+        learners.append({
+            "id": l.id,
+            "key": key,
+            "name": f"{l.first_name} {l.last_name or ''}".strip(),
+        })
+
+        progress.append(_carry_forward_average(points.get(l.id, {}), month_starts))
+
+    return {
+        "months": [m.strftime("%b") for m in month_starts],
+        "learners": learners,
+        "progress": progress,
+    }
+
+
+def progress_series_to_rows(series: dict, top: int = None):
+    """
+    Expand a columnar progress series into chart rows:
+    [{"month": "Jan", "<learner key>": progress, ...}, ...]
+    """
+    learners = series["learners"][:top]
+    progress = series["progress"][:top]
+    return [
+        {"month": month, **{l["key"]: values[i] for l, values in zip(learners, progress)}}
+        for i, month in enumerate(series["months"])
+    ]
+
+
+def get_dashboard_insights_data(db: Session):
+    """
+    Build the dashboard insights payload:
+    - Monthly progress series for the top learners (columnar)
+    - Course-wise engagementData
+    """
+    # Engagement per course (reuses the grouped course query)
+    engagementData = [
+        {
+            "course": c["title"],
+            "timeSpent": c["students"] * 12,       # dummy logic
+            "interactions": c["students"] * 5      # dummy logic
+        }
+        for c in get_course_rows(db)
+    ]
+
+    return {
+        "progressSeries": get_progress_series(db),
+        "engagementData": engagementData
+    }
+
+
+# =========================================================
+# 🗂️ Dashboard Snapshot Store
+# =========================================================
+SECTION_BUILDERS = {
+    "students": get_student_rows,
+    "courses": get_course_rows,
+    "evaluations": get_pending_evaluation_rows,
+    "insights": get_dashboard_insights_data,
+}
+DASHBOARD_SECTIONS = tuple(SECTION_BUILDERS)
+
+
+# Session.info key holding the sections a pending transaction invalidates
+_STALE_SECTIONS_KEY = "dashboard_stale_sections"
+
+
+def mark_dashboard_stale(db: Session, *sections: str):
+    """
+    Flag snapshot sections for rebuild on the next dashboard read.
+    Call from write paths before their commit; the flag is written in its
+    own short transaction once that commit succeeds, so writes never hold
+    a lock on the shared snapshot rows. With no arguments every section is
+    flagged.
+    """
+    db.info.setdefault(_STALE_SECTIONS_KEY, set()).update(sections or DASHBOARD_SECTIONS)
+
+
+@event.listens_for(Session, "after_commit")
+def _flag_stale_sections(session: Session):
+    sections = session.info.pop(_STALE_SECTIONS_KEY, None)
+    if not sections:
+        return
+    try:
+        with session.get_bind().begin() as conn:
+            # Rows already flagged are skipped, so a burst of writes updates each row once
+            conn.execute(
+                update(DashboardSnapshot)
+                .where(DashboardSnapshot.section.in_(sections), DashboardSnapshot.is_stale.is_(False))
+                .values(is_stale=True)
+            )
+    except SQLAlchemyError as e:
+        # The write itself is committed; the snapshot expires after DASHBOARD_SNAPSHOT_MAX_AGE anyway
+        print(f"⚠️ Could not flag dashboard sections {sorted(sections)} as stale: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_stale_sections(session: Session):
+    session.info.pop(_STALE_SECTIONS_KEY, None)
+
+
+def _is_fresh(snapshot: DashboardSnapshot, now: datetime) -> bool:
+    if snapshot is None or snapshot.is_stale or snapshot.refreshed_at is None:
+        return False
+    return (now - snapshot.refreshed_at).total_seconds() <= DASHBOARD_SNAPSHOT_MAX_AGE
+
+
+def get_dashboard_sections(db: Session, *sections: str) -> dict:
+    """
+    Read dashboard sections from the snapshot table (one indexed lookup).
+    Only sections that are missing, stale or expired are rebuilt and stored.
+    """
+    snapshots = {
+        s.section: s
+        for s in db.query(DashboardSnapshot).filter(DashboardSnapshot.section.in_(sections)).all()
+    }
+
+    now = datetime.utcnow()
+    result = {}
+    rebuilt = False
+
+    for section in sections:
+        snapshot = snapshots.get(section)
+        if not _is_fresh(snapshot, now):
+            if snapshot is None:
+                snapshot = DashboardSnapshot(section=section)
+                db.add(snapshot)
+            snapshot.payload = SECTION_BUILDERS[section](db)
+            snapshot.is_stale = False
+            snapshot.refreshed_at = now
+            rebuilt = True
+        result[section] = snapshot.payload
+
+    if rebuilt:
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker created the same section first — serve what we built.
+            db.rollback()
+
+    return result
@@ -1,89 +1,133 @@
 from sqlalchemy.orm import Session
 from Base import Course, Submission, Feedback, Leaderboard, Certification, User
 from app.crud.certificate_generator import generate_certificate
+from app.crud.dashboard_crud import mark_dashboard_stale
+from app.crud.grading_queue import enqueue_grading, AI_PENDING
+from app.crud.text_extraction import extract_text_cached
 from basemodels import FeedbackCreate
 from datetime import datetime, timezone
 from typing import Optional, Tuple, List
 import os
 import aiofiles
-from PyPDF2 import PdfReader
-from fastapi import UploadFile
-import re
-import openai
+import hashlib
+from fastapi import UploadFile, HTTPException
 from dotenv import load_dotenv
-import re
-import google.generativeai as genai
 load_dotenv()
 
-# Initialize OpenAI client
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Uploads are streamed to disk in fixed-size chunks (constant memory per
+# upload), hashed and size-checked while the bytes flow. Files are stored
+# under their sha256, so identical uploads share one file (and its
+# extracted-text cache).
+#   UPLOAD_CHUNK_SIZE      bytes read per chunk
+#   MAX_SUBMISSION_MB      largest accepted assignment file
+#   MAX_MEDIA_MB           largest accepted audio/video feedback file
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_SUBMISSION_MB = int(os.getenv("MAX_SUBMISSION_MB", "50"))
+MAX_MEDIA_MB = int(os.getenv("MAX_MEDIA_MB", "500"))
+
+
+def _too_large(limit_mb: int):
+    return HTTPException(status_code=413, detail=f"File too large (limit {limit_mb} MB)")
+
+
+def _finalize_upload(tmp_path: str, target_dir: str, digest: str, ext: str) -> str:
+    """Move a fully written temp file to its content-addressed name."""
+    file_path = os.path.join(target_dir, f"{digest}.{ext}")
+    if os.path.exists(file_path):
+        os.remove(tmp_path)  # identical file already stored
+    else:
+        os.replace(tmp_path, file_path)
+    return file_path
 
 
 # ===================================================
 # 💾 Save uploaded media file (audio/video feedback)
 # ===================================================
 def save_media_file(file, media_dir="media/"):
-    """Save uploaded feedback media (audio/video) to local directory."""
+    """Save uploaded feedback media (audio/video) to local directory, streaming in chunks."""
     ext = file.filename.split(".")[-1]
-    filename = f"{datetime.utcnow().timestamp()}.{ext}"
     os.makedirs(media_dir, exist_ok=True)
-    filepath = os.path.join(media_dir, filename)
+    tmp_path = os.path.join(media_dir, f"{datetime.utcnow().timestamp()}.{ext}.part")
 
-    with open(filepath, "wb") as f:
-        f.write(file.file.read())
+    limit = MAX_MEDIA_MB * 1024 * 1024
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: file.file.read(UPLOAD_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > limit:
+                    raise _too_large(MAX_MEDIA_MB)
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-    return filepath
+    return _finalize_upload(tmp_path, media_dir, digest.hexdigest(), ext)
 
 
 # ===================================================
 # 📁 Save uploaded submission file
 # ===================================================
 async def save_uploaded_file(file, upload_dir="uploads/submissions"):
-    """Save uploaded assignment file asynchronously."""
+    """Save uploaded assignment file asynchronously, streaming in chunks."""
     os.makedirs(upload_dir, exist_ok=True)
     ext = file.filename.split(".")[-1]
-    filename = f"{datetime.utcnow().timestamp()}.{ext}"
-    file_path = os.path.join(upload_dir, filename)
+    tmp_path = os.path.join(upload_dir, f"{datetime.utcnow().timestamp()}.{ext}.part")
 
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    limit = MAX_SUBMISSION_MB * 1024 * 1024
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > limit:
+                    raise _too_large(MAX_SUBMISSION_MB)
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-    return file_path
+    return _finalize_upload(tmp_path, upload_dir, digest.hexdigest(), ext)
 
 
 # ===================================================
 # 📝 Create Submission + AI Grading
 # ===================================================
-async def create_submission(db: Session, submission_data, file):
+def create_submission(db: Session, submission_data, file_url: Optional[str]):
     """
-    Create a new submission entry, upload file, and trigger AI grading.
+    Create a new submission entry for an uploaded file (see
+    save_uploaded_file) and queue AI grading. Returns immediately with
+    ai_status "pending"; the score and feedback are filled in by the
+    grading queue. Blocking DB work: call from a threadpool in async code.
     """
     try:
-        # 1️⃣ Save file
-        file_url = await save_uploaded_file(file) if file else None
-
-        # 2️⃣ Create initial submission
+        # 1️⃣ Create initial submission
         new_submission = Submission(
             assignment_id=submission_data.assignment_id,
             student_id=submission_data.student_id,
             file_url=file_url,
+            ai_status=AI_PENDING,
             created_at=datetime.now(timezone.utc),
         )
         db.add(new_submission)
+        mark_dashboard_stale(db, "evaluations")
         db.commit()
         db.refresh(new_submission)
 
-        # 3️⃣ Run AI grading
-        ai_score, ai_feedback = grade_assignment_ai(file_url, submission_data.student_id)
-
-        # 4️⃣ Update submission with AI feedback
-        new_submission.ai_score = ai_score
-        new_submission.ai_feedback = ai_feedback
-        db.commit()
-        db.refresh(new_submission)
+        # 2️⃣ Queue AI grading (off the event loop)
+        enqueue_grading(new_submission.id)
 
         return new_submission
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise Exception(f"Failed to create submission: {e}")
 
@@ -237,6 +281,7 @@ def update_score(db: Session, submission_id: int, mentor_score: int):
 
     sub.mentor_score = int(mentor_score)
     db.add(sub)
+    mark_dashboard_stale(db, "evaluations")
     db.flush()
     recalculate_leaderboard_and_certification(db, student_id=sub.student_id)
     db.refresh(sub)
@@ -288,72 +333,45 @@ def get_leaderboard(db: Session, order: str = "asc"):
 #         return 0, f"AI grading failed due to: {e}"
 
 
-# Configure Gemini API key
-from PyPDF2 import PdfReader
-from docx import Document
+# ✅ Gemini SDK is imported and configured on first use, not at worker boot
+_genai = None
+
+
+def get_genai():
+    """Return the configured google.generativeai module (imported lazily)."""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _genai = genai
+    return _genai
 
-# ✅ Load API key from .env file
-load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 def extract_text_from_file(file_path: str) -> str:
     """
     Extracts text content from a variety of file types.
     Supports: .py, .txt, .java, .c, .cpp, .pdf, .docx
+    Stops at EXTRACT_MAX_CHARS and is cached next to the file (see text_extraction).
     """
-    ext = os.path.splitext(file_path)[1].lower()
-
-    try:
-        if ext in [".py", ".txt", ".java", ".c", ".cpp", ".js", ".html", ".css"]:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-
-        elif ext == ".pdf":
-            text = ""
-            with open(file_path, "rb") as f:
-                reader = PdfReader(f)
-                for page in reader.pages:
-                    text += page.extract_text() or ""
-            return text
-
-        elif ext == ".docx":
-            doc = Document(file_path)
-            return "\n".join([para.text for para in doc.paragraphs])
-
-        else:
-            return f"[Unsupported file type: {ext}]"
-
-    except Exception as e:
-        return f"[Error reading file: {e}]"
-
-
-def grade_assignment_ai(file_path: str, student_id: int):
-    """
-    Evaluate any assignment file using Google Gemini.
-    Reads content (text/code/PDF/DOCX) and sends it to the model.
-    Returns (score, feedback).
-    """
-    try:
-        # ✅ Extract content from any supported file
-        file_content = extract_text_from_file(file_path)
-
-        prompt = (
-            f"Evaluate the following student assignment (ID: {student_id}).\n"
-            f"Give a numeric score (0–100) and a one-line feedback.\n\n"
-            f"--- Assignment Content ---\n{file_content}\n"
-            f"---------------------------"
-        )
+    return extract_text_cached(file_path)
 
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(prompt)
 
-        ai_feedback = response.text.strip()
+# Bump whenever build_grading_prompt changes so cached grades are not reused
+GRADING_PROMPT_VERSION = "2"
 
-        # ✅ Extract numeric score (0–100)
-        match = re.search(r"(\d{1,3})", ai_feedback)
-        ai_score = min(int(match.group(1)), 100) if match else 0
 
-        return ai_score, ai_feedback
+def build_grading_prompt(file_content: str, student_id: int, assignment=None) -> str:
+    """Grading prompt for one submission (assignment title/description when known)."""
+    context = ""
+    if assignment is not None:
+        context = f"Assignment: {assignment.title}\n"
+        if assignment.description:
+            context += f"Task: {assignment.description}\n"
 
-    except Exception as e:
-        return 0, f"AI grading failed due to: {e}"
\ No newline at end of file
+    return (
+        f"Evaluate the following student assignment (ID: {student_id}).\n"
+        f"{context}"
+        f"Give a numeric score (0–100) and a one-line feedback.\n\n"
+        f"--- Assignment Content ---\n{file_content}\n"
+        f"---------------------------"
+    )
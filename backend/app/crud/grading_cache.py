@@ -0,0 +1,136 @@
+import hashlib
+import threading
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from Base import GradingCache
+from database import SessionLocal
+from app.crud.grading_engine import GRADING_MODEL
+
+# ==============================================================
+# 🗃️ Grading Cache (identical submissions are graded once)
+# ==============================================================
+# AI grading results keyed by
+# (normalized extracted text, assignment, prompt version, model), so a
+# resubmitted identical file or a regrade costs a lookup instead of a
+# model call. Bump GRADING_PROMPT_VERSION when the prompt changes.
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+def is_cacheable(text: str) -> bool:
+    """Extraction errors / unsupported files are never cached."""
+    text = normalize(text)
+    return bool(text) and not text.startswith(("[Error reading file", "[Unsupported file type", "[No file submitted"))
+
+
+def _record(hits: int, misses: int):
+    with _stats_lock:
+        _stats["hits"] += hits
+        _stats["misses"] += misses
+
+
+def lookup_grades(hashes: list, assignment_id: int, prompt_version: str, model: str = GRADING_MODEL) -> dict:
+    """
+    Return {content_hash: (score, feedback)} for every hash already graded
+    for this assignment / prompt version / model (one query), and bump
+    their hit counters.
+    """
+    hashes = list(set(h for h in hashes if h))
+    if not hashes:
+        return {}
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(GradingCache.id, GradingCache.content_hash, GradingCache.ai_score, GradingCache.ai_feedback)
+            .filter(
+                GradingCache.content_hash.in_(hashes),
+                GradingCache.assignment_id == (assignment_id or 0),
+                GradingCache.prompt_version == prompt_version,
+                GradingCache.model == model,
+            )
+            .all()
+        )
+        if rows:
+            db.query(GradingCache).filter(
+                GradingCache.id.in_([r.id for r in rows])
+            ).update({GradingCache.hits: GradingCache.hits + 1}, synchronize_session=False)
+            db.commit()
+    except Exception as e:
+        # A cache problem must never block grading
+        db.rollback()
+        print(f"⚠️ Grading cache lookup failed: {e}")
+        rows = []
+    finally:
+        db.close()
+
+    found = {r.content_hash: (r.ai_score, r.ai_feedback) for r in rows}
+    _record(len(found), len(hashes) - len(found))
+    return found
+
+
+def store_grades(results: dict, assignment_id: int, prompt_version: str, model: str = GRADING_MODEL):
+    """Save {content_hash: (score, feedback)}; existing entries are left as-is."""
+    values = [
+        {
+            "content_hash": digest,
+            "assignment_id": assignment_id or 0,
+            "prompt_version": prompt_version,
+            "model": model,
+            "ai_score": score,
+            "ai_feedback": feedback,
+            "hits": 0,
+        }
+        for digest, (score, feedback) in results.items()
+        if digest and feedback
+    ]
+    if not values:
+        return
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(GradingCache)
+            .values(values)
+            .on_conflict_do_nothing(constraint="_grading_cache_uc")
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Grading cache write failed: {e}")
+    finally:
+        db.close()
+
+
+def grading_cache_stats() -> dict:
+    """Hit/miss counters for this process plus the size of the stored cache."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+
+    db = SessionLocal()
+    try:
+        entries, total_hits = db.query(
+            func.count(GradingCache.id), func.coalesce(func.sum(GradingCache.hits), 0)
+        ).one()
+    finally:
+        db.close()
+
+    lookups = hits + misses
+    return {
+        "process": {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        },
+        "stored_entries": entries,
+        "stored_hits_total": int(total_hits),
+    }
@@ -0,0 +1,338 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from Base import Submission, Assignment
+from database import SessionLocal, engine
+from app.crud.grading_engine import grading_engine
+from app.crud.grading_cache import content_hash, is_cacheable, lookup_grades, store_grades
+from app.crud.text_extraction import is_extraction_error
+
+load_dotenv()
+
+# ==============================================================
+# 🤖 AI Grading Job Queue
+# ==============================================================
+# Gemini calls take seconds, so submissions are graded in the background
+# instead of inside the request (and on the event loop). The submission is
+# returned right away and clients poll Submission.ai_status:
+#
+#   pending → grading → graded
+#                     ↘ failed
+#
+# A dispatcher thread claims pending submissions in batches (SKIP LOCKED),
+# groups them per assignment and grades them through the rate-limited
+# grading engine. It also polls, so submissions left pending by a restart
+# or another worker are picked up.
+#
+# Only one dispatcher in the whole deployment grades at a time: the
+# grading leader, which holds a Postgres advisory lock on a dedicated
+# connection. The engine's GRADING_RPM budget is therefore a global budget
+# rather than per API worker. If the leader dies its connection closes, the
+# lock is freed and another worker's dispatcher takes over on its next poll.
+# Submissions queued on other workers are graded on the leader's next poll.
+#
+# A claim is a lease: Submission.ai_claimed_at records when the batch was
+# taken, and rows still `grading` after GRADING_LEASE_SECONDS (worker
+# killed, OOM, deploy mid-batch) go back to `pending` on the next poll or
+# startup. A clean shutdown hands its in-flight batch back right away.
+#
+#   GRADING_BATCH_SIZE     submissions claimed per batch
+#   GRADING_POLL_SECONDS   how often the dispatcher looks for pending work
+#   GRADING_LEASE_SECONDS  how long a claimed batch may stay `grading`
+#   GRADING_LEADER_LOCK    advisory lock key used to elect the grading leader
+
+AI_PENDING = "pending"
+AI_GRADING = "grading"
+AI_GRADED = "graded"
+AI_FAILED = "failed"
+
+GRADING_BATCH_SIZE = int(os.getenv("GRADING_BATCH_SIZE", "50"))
+GRADING_POLL_SECONDS = float(os.getenv("GRADING_POLL_SECONDS", "10"))
+GRADING_LEASE_SECONDS = float(os.getenv("GRADING_LEASE_SECONDS", "900"))
+GRADING_LEADER_LOCK = int(os.getenv("GRADING_LEADER_LOCK", "727021"))
+
+_wakeup = threading.Event()
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+_stopping = False
+_in_flight = []  # submission ids of the batch this worker is grading
+_leader_conn = None  # connection holding the leader lock while this worker leads
+
+
+# =========================================================
+# 👑 Grading Leader (one dispatcher grades at a time)
+# =========================================================
+def _is_leader() -> bool:
+    """
+    Take (or confirm) the grading leader lock. The lock lives as long as
+    the dedicated connection, so it is freed when this process dies.
+    """
+    global _leader_conn
+    try:
+        if _leader_conn is None:
+            conn = engine.connect()
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": GRADING_LEADER_LOCK}).scalar()
+            conn.commit()
+            if not acquired:
+                conn.close()
+                return False
+            _leader_conn = conn
+            print(f"👑 Worker {os.getpid()} is the AI grading leader")
+        else:
+            # Still connected (a dropped connection also drops the lock)
+            _leader_conn.execute(text("SELECT 1"))
+            _leader_conn.commit()
+        return True
+    except Exception as e:
+        print(f"⚠️ Grading leader check failed: {e}")
+        _drop_leader(invalidate=True)
+        return False
+
+
+def _drop_leader(invalidate: bool = False):
+    global _leader_conn
+    conn, _leader_conn = _leader_conn, None
+    if conn is None:
+        return
+    try:
+        if invalidate:
+            conn.invalidate()  # really close it, so the server frees the lock
+        else:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": GRADING_LEADER_LOCK})
+            conn.commit()
+    except Exception as e:
+        print(f"⚠️ Could not release the grading leader lock: {e}")
+    finally:
+        conn.close()
+
+
+def _ensure_dispatcher():
+    global _dispatcher, _stopping
+    with _dispatcher_lock:
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _stopping = False
+            _dispatcher = threading.Thread(target=_dispatch_loop, name="ai-grading-dispatcher", daemon=True)
+            _dispatcher.start()
+
+
+def shutdown_grading_pool():
+    """
+    Stop the grading dispatcher (called on app shutdown) and hand this
+    worker's in-flight batch back to the queue.
+    """
+    global _stopping
+    _stopping = True
+    _wakeup.set()
+
+    ids = list(_in_flight)
+    _drop_leader()
+    if not ids:
+        return
+    db = SessionLocal()
+    try:
+        released = _release(db, Submission.id.in_(ids))
+        print(f"🤖 Returned {released} in-flight submissions to the grading queue")
+    except Exception as e:
+        print(f"⚠️ Could not return in-flight submissions to the grading queue: {e}")
+    finally:
+        db.close()
+
+
+def _release(db: Session, *criteria) -> int:
+    """Move `grading` rows matching `criteria` back to `pending`."""
+    released = db.query(Submission).filter(
+        Submission.ai_status == AI_GRADING, *criteria
+    ).update({Submission.ai_status: AI_PENDING, Submission.ai_claimed_at: None}, synchronize_session=False)
+    db.commit()
+    return released
+
+
+def release_expired_claims(db: Session) -> int:
+    """Return submissions whose grading lease ran out to `pending`. Returns how many."""
+    expired = datetime.utcnow() - timedelta(seconds=GRADING_LEASE_SECONDS)
+    released = _release(db, or_(Submission.ai_claimed_at < expired, Submission.ai_claimed_at.is_(None)))
+    if released:
+        print(f"🤖 {released} submissions had an expired grading lease and were re-queued")
+    return released
+
+
+def lease_expired(claimed_at) -> bool:
+    return claimed_at is None or claimed_at < datetime.utcnow() - timedelta(seconds=GRADING_LEASE_SECONDS)
+
+
+def _claim_batch(db: Session) -> list:
+    """
+    Atomically move up to GRADING_BATCH_SIZE pending submissions to
+    `grading` (SKIP LOCKED, so several API workers never claim the same
+    row) and return them as (id, assignment_id, student_id, file_url).
+    """
+    rows = (
+        db.query(Submission)
+        .filter(Submission.ai_status == AI_PENDING)
+        .order_by(Submission.assignment_id, Submission.id)
+        .limit(GRADING_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    batch = [(s.id, s.assignment_id, s.student_id, s.file_url) for s in rows]
+    claimed_at = datetime.utcnow()
+    for s in rows:
+        s.ai_status = AI_GRADING
+        s.ai_claimed_at = claimed_at
+    db.commit()
+    return batch
+
+
+def _grade_batch(db: Session, batch: list):
+    """Grade a claimed batch, one assignment group at a time."""
+    from app.crud.evaluation_crud import extract_text_from_file, build_grading_prompt, GRADING_PROMPT_VERSION
+
+    groups = {}
+    for row in batch:
+        groups.setdefault(row[1], []).append(row)
+
+    for assignment_id, rows in groups.items():
+        # Assignment context is loaded once per group
+        assignment = db.query(Assignment.title, Assignment.description).filter(Assignment.id == assignment_id).first()
+
+        # Extract each file once; identical content shares one grade
+        owners = {}  # content key -> [submission ids]
+        first = {}   # content key -> (student_id, content)
+        # Files that could not be read fail right away instead of grading the error text
+        unreadable = {}  # submission id -> extraction error
+        for submission_id, _, student_id, file_url in rows:
+            content = extract_text_from_file(file_url) if file_url else "[No file submitted]"
+            if is_extraction_error(content):
+                unreadable[submission_id] = content.strip("[]")
+                continue
+            key = content_hash(content) if is_cacheable(content) else f"submission:{submission_id}"
+            owners.setdefault(key, []).append(submission_id)
+            first.setdefault(key, (student_id, content))
+
+        # 🗃️ Previously graded content skips the model entirely
+        cacheable = [key for key in owners if not key.startswith("submission:")]
+        cached = lookup_grades(cacheable, assignment_id, GRADING_PROMPT_VERSION)
+
+        jobs = [
+            {"id": key, "prompt": build_grading_prompt(content, student_id, assignment)}
+            for key, (student_id, content) in first.items()
+            if key not in cached
+        ]
+        results = {r["id"]: r for r in grading_engine.grade_many(jobs)}
+        store_grades(
+            {
+                key: (r["score"], r["feedback"])
+                for key, r in results.items()
+                if r["error"] is None and not key.startswith("submission:")
+            },
+            assignment_id,
+            GRADING_PROMPT_VERSION,
+        )
+
+        graded = 0
+        for key, submission_ids in owners.items():
+            if key in cached:
+                score, feedback = cached[key]
+                values = {Submission.ai_score: score, Submission.ai_feedback: feedback,
+                          Submission.ai_status: AI_GRADED, Submission.ai_latency_ms: 0}
+            elif results[key]["error"] is None:
+                values = {Submission.ai_score: results[key]["score"], Submission.ai_feedback: results[key]["feedback"],
+                          Submission.ai_status: AI_GRADED, Submission.ai_latency_ms: results[key]["latency_ms"]}
+            else:
+                values = {Submission.ai_score: 0,
+                          Submission.ai_feedback: f"AI grading failed due to: {results[key]['error']}",
+                          Submission.ai_status: AI_FAILED, Submission.ai_latency_ms: results[key]["latency_ms"]}
+            if values[Submission.ai_status] == AI_GRADED:
+                graded += len(submission_ids)
+            db.query(Submission).filter(Submission.id.in_(submission_ids)).update(values, synchronize_session=False)
+        for submission_id, error in unreadable.items():
+            db.query(Submission).filter(Submission.id == submission_id).update(
+                {Submission.ai_score: 0, Submission.ai_feedback: f"AI grading failed due to: {error}",
+                 Submission.ai_status: AI_FAILED, Submission.ai_latency_ms: 0},
+                synchronize_session=False,
+            )
+        db.commit()
+
+        print(f"🤖 Assignment {assignment_id}: graded {graded}/{len(rows)} submissions "
+              f"({len(jobs)} model calls, {len(cached)} cache hits)")
+
+
+def _dispatch_loop():
+    """Claim pending submissions in batches and grade them until none are left."""
+    while not _stopping:
+        _wakeup.wait(GRADING_POLL_SECONDS)
+        _wakeup.clear()
+
+        db = SessionLocal()
+        try:
+            release_expired_claims(db)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Could not release expired grading claims: {e}")
+        finally:
+            db.close()
+
+        # Another worker leads: leave the pending work to it
+        if not _is_leader():
+            continue
+
+        while not _stopping:
+            db = SessionLocal()
+            batch = []
+            try:
+                batch = _claim_batch(db)
+                if not batch:
+                    break
+                _in_flight[:] = [row[0] for row in batch]
+                _grade_batch(db, batch)
+            except Exception as e:
+                print(f"❌ AI grading batch failed: {e}")
+                db.rollback()
+                # Hand unfinished rows back to the queue
+                ids = [row[0] for row in batch]
+                if ids:
+                    _release(db, Submission.id.in_(ids))
+                break
+            finally:
+                _in_flight.clear()
+                db.close()
+
+
+def enqueue_grading(submission_id: int = None) -> str:
+    """Wake the grading dispatcher for a (pending) submission and return immediately."""
+    _ensure_dispatcher()
+    _wakeup.set()
+    return AI_PENDING
+
+
+def queue_assignment_grading(db: Session, assignment_id: int, include_failed: bool = True) -> int:
+    """
+    Bulk mode: mark every ungraded (and optionally failed) submission of an
+    assignment pending and wake the dispatcher. Returns how many were queued.
+    """
+    statuses = [AI_PENDING] + ([AI_FAILED] if include_failed else [])
+    queued = db.query(Submission).filter(
+        Submission.assignment_id == assignment_id,
+        or_(Submission.ai_status.in_(statuses), Submission.ai_status.is_(None) & Submission.ai_score.is_(None)),
+    ).update({Submission.ai_status: AI_PENDING}, synchronize_session=False)
+    db.commit()
+    enqueue_grading()
+    return queued
+
+
+def requeue_pending_grading(db: Session) -> int:
+    """
+    On startup: return expired claims to the queue and start the dispatcher
+    if submissions are pending, or still claimed by another (possibly dead)
+    worker so their lease is checked later. Returns how many are pending.
+    """
+    release_expired_claims(db)
+    pending = db.query(Submission.id).filter(Submission.ai_status == AI_PENDING).count()
+    claimed = db.query(Submission.id).filter(Submission.ai_status == AI_GRADING).count()
+    if pending or claimed:
+        enqueue_grading()
+        print(f"🤖 {pending} submissions waiting for AI grading ({claimed} being graded)")
+    return pending
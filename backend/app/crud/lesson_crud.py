@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Response, UploadFile, File, Depends, HTTPException, Query
 import subprocess
-import whisper
 import os
+import hashlib
 from datetime import datetime
 from fastapi import BackgroundTasks
 from typing import Text
@@ -49,6 +49,23 @@ minio_client = Minio(
     secure=MINIO_USE_SSL
 )
 
+# Read size used while hashing uploads
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_upload(file: UploadFile) -> str:
+    """
+    Return the sha256 of an uploaded file, read in chunks.
+    The file is rewound afterwards so it can still be uploaded.
+    """
+    digest = hashlib.sha256()
+    file.file.seek(0)
+    for chunk in iter(lambda: file.file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.file.seek(0)
+    return digest.hexdigest()
+
+
 # ---------------- Function ----------------
 def save_lesson_video(
     db: Session,
@@ -60,6 +77,7 @@ def save_lesson_video(
     """
     Save uploaded lesson file to MinIO and create or update a Lesson.
     Versioning is used if the file already exists (same key).
+    A byte-identical re-upload (same content hash) is not stored again.
     """
 
     # 🔍 Check module exists
@@ -90,6 +108,14 @@ def save_lesson_video(
     if lesson_id:
         existing_lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
 
+    # 🔑 Hash the upload so unchanged files are detected
+    content_hash = hash_upload(file)
+    unchanged = bool(
+        existing_lesson
+        and existing_lesson.content_url
+        and existing_lesson.content_hash == content_hash
+    )
+
     # 🕒 Keep same object name if updating (so versioning works)
     if existing_lesson and existing_lesson.content_url:
         object_name = existing_lesson.content_url.split(f"/{MINIO_BUCKET_NAME}/")[-1]
@@ -98,17 +124,20 @@ def save_lesson_video(
         object_name = f"lessons/{timestamp}_{file.filename}"
 
     # 📤 Upload file (creates a *new version* if same name)
-    try:
-        minio_client.put_object(
-            bucket_name=MINIO_BUCKET_NAME,
-            object_name=object_name,
-            data=file.file,
-            length=-1,
-            part_size=10 * 1024 * 1024,
-            content_type=file.content_type,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading to MinIO: {str(e)}")
+    if unchanged:
+        print(f"♻️ Lesson {existing_lesson.id}: uploaded file is unchanged, keeping current version")
+    else:
+        try:
+            minio_client.put_object(
+                bucket_name=MINIO_BUCKET_NAME,
+                object_name=object_name,
+                data=file.file,
+                length=-1,
+                part_size=10 * 1024 * 1024,
+                content_type=file.content_type,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error uploading to MinIO: {str(e)}")
 
     # 🌐 Generate MinIO file URL
     file_url = f"{MINIO_BASE_URL}/{MINIO_BUCKET_NAME}/{object_name}"
@@ -117,6 +146,7 @@ def save_lesson_video(
     if existing_lesson:
         existing_lesson.content_url = file_url
         existing_lesson.content_type = content_type
+        existing_lesson.content_hash = content_hash
         existing_lesson.description = description or existing_lesson.description
         existing_lesson.updated_at = datetime.utcnow()
         lesson = existing_lesson
@@ -126,6 +156,7 @@ def save_lesson_video(
             title=os.path.splitext(file.filename)[0],
             content_type=content_type,
             content_url=file_url,
+            content_hash=content_hash,
             description=description,
             language="en",
             created_at=datetime.utcnow(),
@@ -140,6 +171,8 @@ def save_lesson_video(
         "lesson_id": lesson.id,
         "file_url": file_url,
         "content_type": content_type,
+        "content_hash": content_hash,
+        "unchanged": unchanged,
         "message": "✅ Lesson uploaded with versioning enabled"
     }
 
@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 import Base, basemodels
 from app.crud.auth import hash_password,verify_password
+from app.crud.dashboard_crud import mark_dashboard_stale
 from fastapi import HTTPException
 
 
@@ -37,6 +38,7 @@ def create_user(db: Session, user_in):
     )
 
     db.add(new_user)
+    mark_dashboard_stale(db, "students", "insights")
     db.commit()
     db.refresh(new_user)
     return new_user
@@ -0,0 +1,52 @@
+import os
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ==============================================================
+# 🗃️ Rendered Subtitle Cache (per API worker)
+# ==============================================================
+# Subtitle documents as served, keyed by row id + version (created_at) +
+# format. A saved subtitle gets a new version, so entries never go stale
+# and need no invalidation; the least recently served ones are dropped
+# once the byte budget is used up. A hit skips loading the subtitle text
+# and, for SRT / JSON, parsing and rendering it again.
+#
+#   SUBTITLE_RENDER_CACHE_MB   memory budget per API worker (0 disables the cache)
+
+SUBTITLE_RENDER_CACHE_MB = float(os.getenv("SUBTITLE_RENDER_CACHE_MB", "32"))
+
+
+class RenderedSubtitleCache:
+    """Thread-safe LRU of rendered documents, bounded by their total length (~bytes)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> content
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+            return content
+
+    def put(self, key: str, content: str):
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = content
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+rendered_subtitles = RenderedSubtitleCache(int(SUBTITLE_RENDER_CACHE_MB * 1024 * 1024))
@@ -0,0 +1,102 @@
+import json
+
+# ==============================================================
+# 📝 Subtitle Formatting
+# ==============================================================
+# Whisper segments ({"start", "end", "text"}, seconds as floats) to
+# WebVTT / SRT / JSON cues and back. Documents are built with a single
+# join (or streamed cue by cue), never by repeated string concatenation.
+# The stored subtitle_text is always a complete WebVTT document.
+
+VTT_HEADER = "WEBVTT"
+
+
+def format_timestamp(seconds: float, decimal_marker: str = ".") -> str:
+    """
+    Seconds -> "HH:MM:SS.mmm" ("," for SRT). Rounded to the nearest
+    millisecond, carrying into seconds/minutes/hours correctly.
+    """
+    total_ms = max(int(round(seconds * 1000)), 0)
+    hours, rest = divmod(total_ms, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    secs, ms = divmod(rest, 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02}{decimal_marker}{ms:03}"
+
+
+def parse_timestamp(value: str) -> float:
+    """"HH:MM:SS.mmm", "MM:SS.mmm" or SRT "HH:MM:SS,mmm" -> seconds."""
+    seconds = 0.0
+    for part in value.strip().replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _cue_text(seg: dict) -> str:
+    # Blank lines would end the cue early
+    return "\n".join(line for line in seg["text"].strip().splitlines() if line.strip())
+
+
+def iter_vtt(segments: list):
+    """Yield a WebVTT document piece by piece (header, then one cue at a time)."""
+    yield f"{VTT_HEADER}\n\n"
+    for seg in segments:
+        yield (
+            f"{format_timestamp(seg['start'])} --> {format_timestamp(seg['end'])}\n"
+            f"{_cue_text(seg)}\n\n"
+        )
+
+
+def segments_to_vtt(segments: list) -> str:
+    """Complete WebVTT document for the segments."""
+    return "".join(iter_vtt(segments))
+
+
+def iter_srt(segments: list):
+    """Yield an SRT document one numbered cue at a time."""
+    for index, seg in enumerate(segments, start=1):
+        yield (
+            f"{index}\n"
+            f"{format_timestamp(seg['start'], ',')} --> {format_timestamp(seg['end'], ',')}\n"
+            f"{_cue_text(seg)}\n\n"
+        )
+
+
+def segments_to_srt(segments: list) -> str:
+    """Complete SRT document for the segments."""
+    return "".join(iter_srt(segments))
+
+
+def segments_to_json(segments: list) -> str:
+    """JSON cue list: [{"start": 1.5, "end": 3.2, "text": "..."}, ...]."""
+    return json.dumps(
+        [
+            {"start": round(seg["start"], 3), "end": round(seg["end"], 3), "text": _cue_text(seg)}
+            for seg in segments
+        ],
+        ensure_ascii=False,
+    )
+
+
+def vtt_to_segments(vtt: str) -> list:
+    """Parse a WebVTT (or SRT) document back into [{"start", "end", "text"}, ...]."""
+    segments = []
+    for block in vtt.replace("\r\n", "\n").split("\n\n"):
+        lines = block.strip().splitlines()
+        for i, line in enumerate(lines):
+            if "-->" in line:
+                start, end = (p.strip().split(" ")[0] for p in line.split("-->", 1))
+                segments.append({
+                    "start": parse_timestamp(start),
+                    "end": parse_timestamp(end),
+                    "text": "\n".join(lines[i + 1:]),
+                })
+                break
+    return segments
+
+
+# format -> (renderer over segments, media type, file extension)
+SUBTITLE_FORMATS = {
+    "vtt": (segments_to_vtt, "text/vtt", "vtt"),
+    "srt": (segments_to_srt, "application/x-subrip", "srt"),
+    "json": (segments_to_json, "application/json", "json"),
+}
@@ -0,0 +1,95 @@
+import os
+import hashlib
+from io import BytesIO
+from dotenv import load_dotenv
+from minio import Minio
+
+load_dotenv()
+
+# ==============================================================
+# ☁️ Subtitle Publishing (MinIO)
+# ==============================================================
+# Finished subtitles are uploaded next to the lesson videos so players can
+# fetch captions straight from object storage (LessonSubtitle.subtitle_url)
+# without touching the API or the database. Object names contain a hash of
+# the document, so a published file never changes and can be cached forever.
+#
+#   SUBTITLE_PUBLISH   "false" to keep subtitles in the database only
+
+SUBTITLE_PUBLISH = os.getenv("SUBTITLE_PUBLISH", "true").lower() == "true"
+SUBTITLE_PREFIX = "subtitles"
+SUBTITLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT")
+MINIO_BUCKET = os.getenv("MINIO_COURSES_BUCKET")
+MINIO_BASE_URL = os.getenv("MINIO_BASE_URL", f"http://{MINIO_ENDPOINT}")
+
+_client = None
+
+
+def _get_client() -> Minio:
+    global _client
+    if _client is None:
+        _client = Minio(
+            MINIO_ENDPOINT.replace("http://", "").replace("https://", ""),
+            access_key=os.getenv("MINIO_ACCESS_KEY"),
+            secret_key=os.getenv("MINIO_SECRET_KEY"),
+            secure=os.getenv("MINIO_USE_SSL", "False").lower() == "true"
+        )
+    return _client
+
+
+def _object_name(url: str) -> str:
+    return url.split(f"/{MINIO_BUCKET}/")[-1]
+
+
+def publish_subtitle(lesson_id: int, language: str, vtt_text: str):
+    """
+    Upload a finished WebVTT document and return its public URL, or None if
+    publishing is disabled or fails (the API keeps serving it from the DB).
+    """
+    if not SUBTITLE_PUBLISH:
+        return None
+
+    data = vtt_text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    object_name = f"{SUBTITLE_PREFIX}/{lesson_id}/{language}-{digest}.vtt"
+    try:
+        _get_client().put_object(
+            bucket_name=MINIO_BUCKET,
+            object_name=object_name,
+            data=BytesIO(data),
+            length=len(data),
+            content_type="text/vtt; charset=utf-8",
+            metadata={"Cache-Control": SUBTITLE_CACHE_CONTROL},
+        )
+    except Exception as e:
+        print(f"⚠️ Could not publish '{language}' subtitles for lesson {lesson_id}: {e}")
+        return None
+
+    return f"{MINIO_BASE_URL}/{MINIO_BUCKET}/{object_name}"
+
+
+def discard_subtitle(url: str, current_url: str = None):
+    """
+    Remove a superseded subtitle file. Call after the new URL is committed
+    so players never see a URL whose file is already gone.
+    """
+    if not url or url == current_url:
+        return
+    try:
+        _get_client().remove_object(MINIO_BUCKET, _object_name(url))
+    except Exception as e:
+        print(f"⚠️ Could not remove old subtitle file {url}: {e}")
+
+
+def remove_lesson_subtitles(lesson_id: int):
+    """Delete every published subtitle file of a lesson."""
+    if not SUBTITLE_PUBLISH:
+        return
+    try:
+        client = _get_client()
+        for obj in client.list_objects(MINIO_BUCKET, prefix=f"{SUBTITLE_PREFIX}/{lesson_id}/", recursive=True):
+            client.remove_object(MINIO_BUCKET, obj.object_name)
+    except Exception as e:
+        print(f"⚠️ Could not remove subtitle files for lesson {lesson_id}: {e}")
@@ -0,0 +1,171 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ==============================================================
+# 📄 Submission Text Extraction
+# ==============================================================
+# Text is pulled out of a submission piece by piece (PDF page, DOCX
+# paragraph, text block) and extraction stops as soon as the character
+# budget is reached, so a 300-page PDF costs no more than the part the
+# grader will actually read. PDF / DOCX parsing runs in a small process
+# pool to keep the API worker responsive, and the result is cached in a
+# sidecar file next to the upload (`<file>.<budget>.txt`).
+#
+#   EXTRACT_MAX_CHARS   character budget per submission (~4 chars per token)
+#   EXTRACT_WORKERS     extraction processes (per API worker)
+#   EXTRACT_TIMEOUT     seconds to wait for one file
+
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "60000"))
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "120"))
+
+TEXT_EXTENSIONS = [".py", ".txt", ".java", ".c", ".cpp", ".js", ".html", ".css"]
+PARSED_EXTENSIONS = [".pdf", ".docx"]
+TRUNCATED_MARKER = "\n[... truncated: remaining content not graded ...]"
+ERROR_PREFIX = "[Error reading file"
+UNSUPPORTED_PREFIX = "[Unsupported file type"
+
+# Read size for plain-text submissions
+TEXT_READ_CHUNK = 64 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _reset_executor(terminate: bool = False):
+    """
+    Drop the pool; the next extraction starts a fresh one. With `terminate`
+    the worker processes are killed too (shutdown alone would leave a hung
+    parse running in the background).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            processes = list((getattr(_executor, "_processes", None) or {}).values())
+            _executor.shutdown(wait=False, cancel_futures=True)
+            if terminate:
+                for process in processes:
+                    process.terminate()
+        _executor = None
+
+
+def shutdown_extraction_pool():
+    """Stop the extraction processes (called on app shutdown)."""
+    _reset_executor()
+
+
+def iter_file_text(file_path: str):
+    """Yield the text of a submission lazily: per block, page or paragraph."""
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext in TEXT_EXTENSIONS:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for block in iter(lambda: f.read(TEXT_READ_CHUNK), ""):
+                yield block
+
+    elif ext == ".pdf":
+        from PyPDF2 import PdfReader
+        with open(file_path, "rb") as f:
+            for page in PdfReader(f).pages:
+                yield page.extract_text() or ""
+
+    elif ext == ".docx":
+        from docx import Document
+        for para in Document(file_path).paragraphs:
+            yield para.text + "\n"
+
+    else:
+        yield f"{UNSUPPORTED_PREFIX}: {ext}]"
+
+
+def extract_text(file_path: str, max_chars: int = EXTRACT_MAX_CHARS) -> str:
+    """Join the pieces of `iter_file_text` until `max_chars` is reached."""
+    try:
+        parts = []
+        size = 0
+        for piece in iter_file_text(file_path):
+            if size + len(piece) > max_chars:
+                parts.append(piece[:max_chars - size])
+                parts.append(TRUNCATED_MARKER)
+                break
+            parts.append(piece)
+            size += len(piece)
+        return "".join(parts)
+
+    except Exception as e:
+        return _error_text(e)
+
+
+def _error_text(error: Exception) -> str:
+    return f"{ERROR_PREFIX}: {str(error) or type(error).__name__}]"
+
+
+def is_extraction_error(text: str) -> bool:
+    """True if `text` is the error placeholder instead of the file's content."""
+    return text.startswith(ERROR_PREFIX)
+
+
+def _sidecar_path(file_path: str, max_chars: int) -> str:
+    return f"{file_path}.{max_chars}.txt"
+
+
+def extract_text_cached(file_path: str, max_chars: int = EXTRACT_MAX_CHARS) -> str:
+    """
+    Extracted (budgeted) text of a submission file. Served from the
+    sidecar cache when present; PDF / DOCX are parsed in the extraction
+    pool, plain text in-process.
+    """
+    sidecar = _sidecar_path(file_path, max_chars)
+    if os.path.exists(sidecar):
+        with open(sidecar, "r", encoding="utf-8") as f:
+            return f.read()
+
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in PARSED_EXTENSIONS:
+        try:
+            try:
+                future = _get_executor().submit(extract_text, file_path, max_chars)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM on a huge file) — start a fresh pool and retry once
+                _reset_executor()
+                future = _get_executor().submit(extract_text, file_path, max_chars)
+            text = future.result(timeout=EXTRACT_TIMEOUT)
+        except FutureTimeoutError:
+            # The parse is stuck: recycle the pool so it stops holding a worker
+            _reset_executor(terminate=True)
+            return _error_text(TimeoutError(f"extraction took longer than {EXTRACT_TIMEOUT:.0f}s"))
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                _reset_executor()
+            return _error_text(e)
+    else:
+        text = extract_text(file_path, max_chars)
+
+    if not text.startswith((ERROR_PREFIX, UNSUPPORTED_PREFIX)):
+        try:
+            # Write then rename so a concurrent reader never sees a partial file
+            tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, sidecar)
+        except OSError as e:
+            print(f"⚠️ Could not cache extracted text for {file_path}: {e}")
+
+    return text
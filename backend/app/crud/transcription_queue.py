@@ -0,0 +1,415 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from Base import Lesson, LessonSubtitle
+from database import SessionLocal, engine
+from app.crud.subtitle_storage import publish_subtitle, discard_subtitle
+from app.crud.whisper_models import preload_worker_models
+
+load_dotenv()
+
+# ==============================================================
+# 🎬 Transcription Job Queue
+# ==============================================================
+# Whisper inference is CPU-heavy, so subtitle jobs run in a bounded pool
+# of worker *processes* instead of FastAPI BackgroundTasks inside the API
+# worker. The CPU-bound stages of a job are submitted to that one pool:
+# plan (stream the audio, pick chunk cuts), then one task per chunk (see
+# chunked_transcription). A light coordinator thread in the API worker
+# waits on them, so a long lesson spreads over the pool without ever
+# starting a pool of its own, and then saves and translates the result
+# itself (network I/O, no reason to hold a Whisper process for it).
+# Job state is persisted on LessonSubtitle.status:
+#
+#   queued  → running → done
+#                     ↘ failed
+#
+# While running, LessonSubtitle.progress (0-100) tracks each language and
+# every language is committed as soon as it is ready (English first).
+#
+# The queue itself lives in the API worker's memory. A running job holds a
+# Postgres advisory lock on the lesson (on a dedicated connection, so it is
+# freed if the worker dies); at startup, `queued`/`running` rows whose
+# lesson is not locked were left by a dead worker and are queued again. A
+# clean shutdown marks the jobs it drops as failed.
+#
+#   TRANSCRIPTION_WORKERS   transcription processes per API worker process; each loads
+#                           one Whisper model and gets an equal share of the CPU threads.
+#                           The cap is not global: N API workers run up to
+#                           N x TRANSCRIPTION_WORKERS transcriptions (and models)
+#   TRANSCRIPTION_JOB_LOCK  advisory lock namespace for running jobs (keyed by lesson id)
+#
+# Every finished row records the Lesson.content_hash it was built from
+# (LessonSubtitle.source_hash), so an unchanged video is never transcribed
+# or translated twice.
+
+TRANSCRIPTION_WORKERS = int(os.getenv("TRANSCRIPTION_WORKERS", "2"))
+TRANSCRIPTION_JOB_LOCK = int(os.getenv("TRANSCRIPTION_JOB_LOCK", "727012"))
+
+SUBTITLE_QUEUED = "queued"
+SUBTITLE_RUNNING = "running"
+SUBTITLE_DONE = "done"
+SUBTITLE_FAILED = "failed"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Coordinators (threads in the API worker) — at most one per pool process
+_coordinator = ThreadPoolExecutor(max_workers=TRANSCRIPTION_WORKERS, thread_name_prefix="transcription-job")
+
+# Jobs handed to the coordinators and not finished yet: {future: (lesson_id, languages)}
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _init_worker(threads: int):
+    # Split the cores between pool processes instead of each torch using all of them
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+    # Preload WHISPER_PRELOAD here so the API process stays torch-free
+    preload_worker_models()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # "spawn" so children never inherit the API worker's DB connections
+            _executor = ProcessPoolExecutor(
+                max_workers=TRANSCRIPTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(max((os.cpu_count() or 1) // TRANSCRIPTION_WORKERS, 1),),
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _submit(fn, *args):
+    try:
+        return _get_executor().submit(fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM) — start a fresh pool and retry once
+        _reset_executor()
+        return _get_executor().submit(fn, *args)
+
+
+def shutdown_transcription_pool():
+    """
+    Stop the coordinators and worker processes (called on app shutdown)
+    and mark the jobs that were dropped, queued or running, as failed.
+    """
+    _coordinator.shutdown(wait=False, cancel_futures=True)
+    _reset_executor()
+
+    with _jobs_lock:
+        dropped = list(_jobs.values())
+        _jobs.clear()
+    for lesson_id, languages in dropped:
+        try:
+            _mark_failed(lesson_id, languages)
+        except Exception as e:
+            print(f"⚠️ Could not mark the transcription job of lesson {lesson_id} as failed: {e}")
+    if dropped:
+        print(f"🎬 Stopped {len(dropped)} unfinished transcription jobs")
+
+
+def _start_job(lesson_id: int, file_url: str, languages: list):
+    """Hand a job to the coordinators and track it until it finishes."""
+    with _jobs_lock:
+        future = _coordinator.submit(_run_job, lesson_id, file_url, languages)
+        _jobs[future] = (lesson_id, languages)
+    future.add_done_callback(_forget_job)
+
+
+def _forget_job(future):
+    with _jobs_lock:
+        _jobs.pop(future, None)
+
+
+# =========================================================
+# 🔒 Job Locks (which lessons are being transcribed right now)
+# =========================================================
+def _lock_lesson(lesson_id: int):
+    """
+    Wait for and take the job lock of a lesson on a dedicated connection.
+    Jobs for the same lesson therefore run one after the other.
+    """
+    conn = engine.connect()
+    try:
+        conn.execute(text("SELECT pg_advisory_lock(:ns, :lesson)"), {"ns": TRANSCRIPTION_JOB_LOCK, "lesson": lesson_id})
+        conn.commit()
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def _unlock_lesson(conn, lesson_id: int):
+    try:
+        conn.execute(text("SELECT pg_advisory_unlock(:ns, :lesson)"), {"ns": TRANSCRIPTION_JOB_LOCK, "lesson": lesson_id})
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Could not release the transcription lock of lesson {lesson_id}: {e}")
+        conn.invalidate()  # really close it, so the server frees the lock
+    finally:
+        conn.close()
+
+
+def _is_locked(db: Session, lesson_id: int) -> bool:
+    """True if a job for the lesson is running in some worker."""
+    params = {"ns": TRANSCRIPTION_JOB_LOCK, "lesson": lesson_id}
+    if not db.execute(text("SELECT pg_try_advisory_lock(:ns, :lesson)"), params).scalar():
+        return True
+    db.execute(text("SELECT pg_advisory_unlock(:ns, :lesson)"), params)
+    return False
+
+
+# Progress checkpoints of a job (per language)
+PROGRESS_QUEUED = 0
+PROGRESS_RUNNING = 5
+PROGRESS_TRANSCRIBED = 50
+PROGRESS_DONE = 100
+
+
+def set_subtitle_status(db: Session, lesson_id: int, languages, status: str = None, progress: int = None):
+    """Set the job status and/or progress on the subtitle rows of `languages` for a lesson."""
+    values = {}
+    if status is not None:
+        values[LessonSubtitle.status] = status
+    if progress is not None:
+        values[LessonSubtitle.progress] = progress
+    db.query(LessonSubtitle).filter(
+        LessonSubtitle.lesson_id == lesson_id,
+        LessonSubtitle.language.in_(languages),
+    ).update(values, synchronize_session=False)
+
+
+def _mark_failed(lesson_id: int, languages):
+    """Mark the languages of a job that did not finish as failed (committed ones stay done)."""
+    db = SessionLocal()
+    try:
+        db.query(LessonSubtitle).filter(
+            LessonSubtitle.lesson_id == lesson_id,
+            LessonSubtitle.language.in_(languages),
+            LessonSubtitle.status != SUBTITLE_DONE,
+        ).update({LessonSubtitle.status: SUBTITLE_FAILED}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _set_progress(lesson_id: int, languages, progress: int):
+    db = SessionLocal()
+    try:
+        set_subtitle_status(db, lesson_id, languages, progress=progress)
+        db.commit()
+    except Exception as e:
+        # Progress is informational — never fail the job over it
+        print(f"⚠️ Could not record progress for lesson {lesson_id}: {e}")
+    finally:
+        db.close()
+
+
+def _run_job(lesson_id: int, file_url: str, languages: list):
+    """
+    Coordinate one subtitle job (API worker thread): submit its Whisper
+    stages to the transcription pool, wait for them, then save and
+    translate the transcript here.
+    """
+    from app.crud.translate_crud import start_subtitle_job, finish_subtitles
+    from app.crud.chunked_transcription import transcribe_chunk, stitch_chunks
+
+    futures = []
+    lock = None
+    try:
+        lock = _lock_lesson(lesson_id)
+        # Another job for the lesson may have finished some languages while we waited
+        languages = _languages_to_build(lesson_id, languages)
+        if not languages:
+            return
+
+        plan = _submit(start_subtitle_job, lesson_id, file_url, languages).result()
+        if plan is None:
+            return
+
+        segments = plan.get("segments")
+        if segments is None:
+            # ✂️ One pool task per chunk; they run side by side with other jobs
+            futures = [_submit(transcribe_chunk, file_url, *chunk) for chunk in plan["chunks"]]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                _set_progress(lesson_id, languages, PROGRESS_RUNNING + (
+                    (PROGRESS_TRANSCRIBED - PROGRESS_RUNNING) * done // len(futures)
+                ))
+            segments = stitch_chunks([future.result() for future in futures])
+
+        finish_subtitles(lesson_id, segments, languages)
+
+    except Exception as e:
+        print(f"❌ Transcription job for lesson {lesson_id} did not finish: {e or type(e).__name__}")
+        for future in futures:
+            future.cancel()
+        _mark_failed(lesson_id, languages)
+    finally:
+        if lock is not None:
+            _unlock_lesson(lock, lesson_id)
+
+
+def _is_current(subtitle: LessonSubtitle, content_hash: str) -> bool:
+    """True if `subtitle` is finished and was built from this exact video."""
+    return bool(
+        content_hash
+        and subtitle is not None
+        and subtitle.status == SUBTITLE_DONE
+        and subtitle.source_hash == content_hash
+        and subtitle.subtitle_text
+    )
+
+
+def _languages_to_build(lesson_id: int, languages: list) -> list:
+    """The languages whose subtitle does not match the lesson's current video yet."""
+    db = SessionLocal()
+    try:
+        lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+        content_hash = lesson.content_hash if lesson else None
+        current = {
+            s.language
+            for s in db.query(LessonSubtitle).filter(LessonSubtitle.lesson_id == lesson_id).all()
+            if _is_current(s, content_hash)
+        }
+        return [lang for lang in languages if lang not in current]
+    finally:
+        db.close()
+
+
+def _shared_transcripts(db: Session, lesson_id: int, content_hash: str) -> dict:
+    """
+    Finished subtitles of *other* lessons uploaded with the same video,
+    as {language: (language, subtitle_text, subtitle_url)}.
+    """
+    if not content_hash:
+        return {}
+    rows = (
+        db.query(LessonSubtitle.language, LessonSubtitle.subtitle_text, LessonSubtitle.subtitle_url)
+        .join(Lesson, Lesson.id == LessonSubtitle.lesson_id)
+        .filter(
+            Lesson.content_hash == content_hash,
+            Lesson.id != lesson_id,
+            LessonSubtitle.source_hash == content_hash,
+            LessonSubtitle.status == SUBTITLE_DONE,
+            LessonSubtitle.subtitle_text != "",
+        )
+        .all()
+    )
+    return {r.language: r for r in rows}
+
+
+def enqueue_transcription(db: Session, lesson_id: int, file_url: str, languages: str) -> str:
+    """
+    Queue subtitle generation for the languages that actually need it.
+
+    Languages whose subtitle already matches the lesson's content hash are
+    left untouched; languages available from another lesson with the same
+    video are copied. The rest get a `queued` row (existing rows keep their
+    text until the new one is ready) and are handed to the transcription
+    pool. Returns immediately with the resulting status.
+    """
+    target_languages = [lang.strip() for lang in languages.split(",") if lang.strip()]
+
+    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    content_hash = lesson.content_hash if lesson else None
+
+    existing = {
+        s.language: s
+        for s in db.query(LessonSubtitle).filter(LessonSubtitle.lesson_id == lesson_id).all()
+    }
+    shared = _shared_transcripts(db, lesson_id, content_hash)
+
+    pending = []
+    superseded = []
+    for lang in target_languages:
+        subtitle = existing.get(lang)
+
+        # ♻️ Same video as last time — nothing to do
+        if _is_current(subtitle, content_hash):
+            continue
+
+        if subtitle is None:
+            subtitle = LessonSubtitle(lesson_id=lesson_id, subtitle_text="", language=lang)
+            db.add(subtitle)
+
+        # ♻️ Same video uploaded to another lesson — copy its transcript
+        if lang in shared:
+            old_url = subtitle.subtitle_url
+            subtitle.subtitle_text = shared[lang].subtitle_text
+            subtitle.subtitle_url = publish_subtitle(lesson_id, lang, subtitle.subtitle_text)
+            superseded.append((old_url, subtitle.subtitle_url))
+            subtitle.source_hash = content_hash
+            subtitle.status = SUBTITLE_DONE
+            subtitle.progress = PROGRESS_DONE
+            subtitle.created_at = datetime.utcnow()
+            continue
+
+        subtitle.status = SUBTITLE_QUEUED
+        subtitle.progress = PROGRESS_QUEUED
+        pending.append(lang)
+    db.commit()
+
+    for old_url, new_url in superseded:
+        discard_subtitle(old_url, new_url)
+
+    if not pending:
+        print(f"♻️ Lesson {lesson_id}: subtitles already match the uploaded video, nothing to transcribe")
+        return SUBTITLE_DONE
+
+    _start_job(lesson_id, file_url, pending)
+    return SUBTITLE_QUEUED
+
+
+def requeue_orphaned_transcriptions(db: Session) -> int:
+    """
+    On startup: queue again the jobs a dead worker left `queued` or
+    `running` (their lesson is not locked by any live job). Rows whose
+    lesson has no video any more are marked failed. Returns how many jobs
+    were queued.
+    """
+    rows = (
+        db.query(LessonSubtitle.lesson_id, LessonSubtitle.language, Lesson.content_url)
+        .join(Lesson, Lesson.id == LessonSubtitle.lesson_id)
+        .filter(LessonSubtitle.status.in_((SUBTITLE_QUEUED, SUBTITLE_RUNNING)))
+        .all()
+    )
+    orphaned = {}
+    for r in rows:
+        orphaned.setdefault((r.lesson_id, r.content_url), []).append(r.language)
+
+    jobs = []
+    for (lesson_id, file_url), languages in orphaned.items():
+        if _is_locked(db, lesson_id):
+            continue  # still being transcribed by another worker
+        if not file_url:
+            set_subtitle_status(db, lesson_id, languages, SUBTITLE_FAILED)
+            continue
+        set_subtitle_status(db, lesson_id, languages, SUBTITLE_QUEUED, PROGRESS_QUEUED)
+        jobs.append((lesson_id, file_url, languages))
+    db.commit()
+
+    for job in jobs:
+        _start_job(*job)
+    if jobs:
+        print(f"🎬 Re-queued {len(jobs)} transcription jobs left unfinished by a previous run")
+    return len(jobs)
@@ -1,20 +1,43 @@
 import os
+import random
+import time
 from datetime import datetime
-import asyncio
-import whisper
-from io import BytesIO
 from Base import Lesson, LessonSubtitle
-from basemodels import SubtitleSchema
 from database import SessionLocal
+from app.crud.subtitle_format import segments_to_vtt, vtt_to_segments
+from app.crud.subtitle_storage import publish_subtitle, discard_subtitle
+from app.crud.chunked_transcription import plan_chunks
+from app.crud.translation_memory import lookup_translations, store_translations, normalize
+from app.crud.transcription_queue import (
+    set_subtitle_status, SUBTITLE_RUNNING, SUBTITLE_DONE, SUBTITLE_FAILED,
+    PROGRESS_RUNNING, PROGRESS_TRANSCRIBED, PROGRESS_DONE
+)
 import requests
-from dotenv import load_dotenv
-from minio import Minio
-import tempfile
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 # Get the translation API URL from environment variables
 API_URL = os.getenv("API_URL")
 
+# Batching / concurrency for subtitle translation
+#   TRANSLATION_BATCH_SIZE   max segments per request
+#   TRANSLATION_BATCH_CHARS  max characters per request
+#   TRANSLATION_PARALLELISM  languages translated concurrently (and pooled connections)
+#   TRANSLATION_TIMEOUT      per-request timeout in seconds
+#   TRANSLATION_MAX_RETRIES  retries per batch (after the first attempt) before the language fails
+#   TRANSLATION_BACKOFF      base backoff in seconds between batch retries (doubles per retry)
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "50"))
+TRANSLATION_BATCH_CHARS = int(os.getenv("TRANSLATION_BATCH_CHARS", "5000"))
+TRANSLATION_PARALLELISM = int(os.getenv("TRANSLATION_PARALLELISM", "4"))
+TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "30"))
+TRANSLATION_MAX_RETRIES = int(os.getenv("TRANSLATION_MAX_RETRIES", "3"))
+TRANSLATION_BACKOFF = float(os.getenv("TRANSLATION_BACKOFF", "2.0"))
+
+
+class TranslationError(Exception):
+    """A batch could not be translated; the language must not be saved as done."""
+
 
 # -----------------------------
 # File Type Mapping
@@ -26,142 +49,286 @@ EXTENSION_MAP = {
 }
 
 
-def segments_to_vtt(segments: list) -> str:
-    vtt = "WEBVTT\n\n"
-    for seg in segments:
-        start_h = int(seg['start'] // 3600)
-        start_m = int((seg['start'] % 3600) // 60)
-        start_s = int(seg['start'] % 60)
-        end_h = int(seg['end'] // 3600)
-        end_m = int((seg['end'] % 3600) // 60)
-        end_s = int(seg['end'] % 60)
-
-        start_ms = int((seg['start'] % 1) * 1000)
-        end_ms = int((seg['end'] % 1) * 1000)
+def _save_subtitle(db, lesson_id: int, lang: str, segments: list, content_hash: str):
+    """Write one finished language and commit it right away."""
+    subtitle = (
+        db.query(LessonSubtitle)
+        .filter(LessonSubtitle.lesson_id == lesson_id, LessonSubtitle.language == lang)
+        .first()
+    )
+    if subtitle is None:
+        subtitle = LessonSubtitle(lesson_id=lesson_id, language=lang)
+        db.add(subtitle)
+    old_url = subtitle.subtitle_url
+    subtitle.subtitle_text = segments_to_vtt(segments)
+    subtitle.subtitle_url = publish_subtitle(lesson_id, lang, subtitle.subtitle_text)
+    subtitle.source_hash = content_hash
+    subtitle.status = SUBTITLE_DONE
+    subtitle.progress = PROGRESS_DONE
+    subtitle.created_at = datetime.utcnow()
+    db.commit()
+    discard_subtitle(old_url, subtitle.subtitle_url)
 
-        vtt += f"{start_h:02}:{start_m:02}:{start_s:02}.{start_ms:03} --> {end_h:02}:{end_m:02}:{end_s:02}.{end_ms:03}\n"
-        vtt += seg['text'].strip() + "\n\n"
-    return vtt
 
-def generate_subtitles_background(lesson_id: int, file_path: str, languages: str):
+def _report_progress(lesson_id: int, lang: str):
     """
-    Generate subtitles for a given lesson video stored in MinIO or local path.
-    Downloads the file to a local folder and deletes it after use.
+    Progress callback for one language's translation. Runs on a translation
+    thread, so it uses its own short-lived session.
     """
-    load_dotenv()  # ✅ Load environment variables
+    def report(done: int, total: int):
+        progress = PROGRESS_TRANSCRIBED + (PROGRESS_DONE - PROGRESS_TRANSCRIBED) * done // max(total, 1)
+        db = SessionLocal()
+        try:
+            set_subtitle_status(db, lesson_id, [lang], progress=min(progress, PROGRESS_DONE - 1))
+            db.commit()
+        except Exception as e:
+            # Progress is informational — never fail the translation over it
+            print(f"⚠️ Could not record progress for lesson {lesson_id} '{lang}': {e}")
+        finally:
+            db.close()
+    return report
 
-    # ✅ MinIO Configuration
-    MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT")
-    MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
-    MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
-    MINIO_BUCKET = os.getenv("MINIO_COURSES_BUCKET")
 
-    # ✅ Local working folder for subtitle generation
-    temp_dir = os.path.join(os.getcwd(), "subtitles_temp")
-    os.makedirs(temp_dir, exist_ok=True)
+def start_subtitle_job(lesson_id: int, file_path: str, languages: list):
+    """
+    First stage of a subtitle job (runs in a transcription pool process):
+    mark the languages running and either reuse the lesson's English
+    transcript or plan the transcription.
 
+    Returns {"segments": [...]} when the transcript is already known (same
+    video as the stored English subtitles, or short audio transcribed right
+    away), {"chunks": [...]} for `transcribe_chunk` jobs, or None if the
+    lesson no longer exists.
+    """
     db = SessionLocal()
-    local_video_path = None
     try:
         lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
         if not lesson:
             print(f"❌ Lesson {lesson_id} not found for subtitle generation.")
-            return
+            return None
 
         print(f"🎬 Generating subtitles for lesson {lesson.id} ...")
+        set_subtitle_status(db, lesson.id, languages, SUBTITLE_RUNNING, PROGRESS_RUNNING)
+        db.commit()
 
-        # ✅ If the video is in MinIO, download it
-        if file_path.startswith("http://") or file_path.startswith("https://"):
-            client = Minio(
-                MINIO_ENDPOINT.replace("http://", "").replace("https://", ""),
-                access_key=MINIO_ACCESS_KEY,
-                secret_key=MINIO_SECRET_KEY,
-                secure=MINIO_ENDPOINT.startswith("https")
-            )
-
-            # Extract file name from URL
-            object_name = file_path.split(f"{MINIO_BUCKET}/")[-1]
-            filename = os.path.basename(object_name)
-            local_video_path = os.path.join(temp_dir, filename)
-
-            # 🧩 Download file to local folder
-            client.fget_object(MINIO_BUCKET, object_name, local_video_path)
-        else:
-            # If it’s already local
-            local_video_path = file_path
+        content_hash = lesson.content_hash
+        english = (
+            db.query(LessonSubtitle)
+            .filter(LessonSubtitle.lesson_id == lesson.id, LessonSubtitle.language == "en")
+            .first()
+        )
 
-        # ✅ Transcribe video using Whisper
-        model = whisper.load_model("base")
-        result = model.transcribe(local_video_path, language="en")
-        segments = result.get("segments", [])
+        # ♻️ Reuse the English transcript when the video is unchanged
+        if (
+            "en" not in languages
+            and content_hash
+            and english is not None
+            and english.source_hash == content_hash
+            and english.subtitle_text
+        ):
+            print(f"♻️ Reusing English transcript for lesson {lesson.id}")
+            return {"segments": vtt_to_segments(english.subtitle_text)}
+    finally:
+        db.close()
 
-        target_languages = [lang.strip() for lang in languages.split(",")]
+    return plan_chunks(file_path)
 
-        for lang in target_languages:
-            if lang == "en":
-                vtt_text = segments_to_vtt(segments)
-            else:
-                translated_segments = []
-                for seg in segments:
-                    translated_text = translate_text(seg['text'], target_lang=lang)
-                    translated_segments.append({
-                        "start": seg['start'],
-                        "end": seg['end'],
-                        "text": translated_text
-                    })
-                vtt_text = segments_to_vtt(translated_segments)
-
-            subtitle = LessonSubtitle(
-                lesson_id=lesson.id,
-                subtitle_text=vtt_text,
-                language=lang,
-                created_at=datetime.utcnow()
-            )
-            db.add(subtitle)
 
+def finish_subtitles(lesson_id: int, segments: list, languages: list):
+    """
+    Last stage of a subtitle job. Runs on the job's coordinator thread in
+    the API worker: saving and translating is I/O, not Whisper work, so it
+    does not take a transcription pool process.
+
+    English is committed right away; every other language is committed the
+    moment its translation finishes, with per-language progress on
+    LessonSubtitle in between.
+    """
+    remaining = set(languages)
+
+    db = SessionLocal()
+    try:
+        lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+        if not lesson:
+            print(f"❌ Lesson {lesson_id} was deleted during subtitle generation.")
+            return
+        content_hash = lesson.content_hash
+
+        # 🇬🇧 English first — usable while the translations run
+        if "en" in remaining:
+            _save_subtitle(db, lesson.id, "en", segments, content_hash)
+            remaining.discard("en")
+            print(f"✅ English subtitles ready for lesson {lesson.id}")
+
+        set_subtitle_status(db, lesson.id, list(remaining), progress=PROGRESS_TRANSCRIBED)
         db.commit()
-        print(f"✅ Subtitles generated for lesson {lesson.id} in {languages}")
+
+        # 🌍 Translate the other languages concurrently; commit each as it lands.
+        # A language whose translation fails is marked failed (never saved as
+        # done with missing cues), so the next run regenerates it.
+        progress = {lang: _report_progress(lesson.id, lang) for lang in remaining}
+        failed = []
+        for lang, translated in iter_translated_segments(segments, list(remaining), progress, skip_failed=True):
+            if translated is None:
+                set_subtitle_status(db, lesson.id, [lang], SUBTITLE_FAILED)
+                db.commit()
+                failed.append(lang)
+            else:
+                _save_subtitle(db, lesson.id, lang, translated, content_hash)
+                print(f"✅ '{lang}' subtitles ready for lesson {lesson.id}")
+            remaining.discard(lang)
+
+        if failed:
+            print(f"⚠️ Subtitles for lesson {lesson.id} failed in {', '.join(failed)}")
+        else:
+            print(f"✅ Subtitles generated for lesson {lesson.id} in {', '.join(languages)}")
 
     except Exception as e:
         print(f"❌ Subtitle generation failed for lesson {lesson_id}: {e}")
+        db.rollback()
+        # Languages already committed stay done
+        if remaining:
+            set_subtitle_status(db, lesson_id, list(remaining), SUBTITLE_FAILED)
+            db.commit()
 
     finally:
-        # 🧹 Clean up downloaded video after transcription
-        if local_video_path and os.path.exists(local_video_path):
-            try:
-                os.remove(local_video_path)
-                print(f"🧹 Deleted temp file: {local_video_path}")
-            except Exception as cleanup_error:
-                print(f"⚠️ Cleanup failed: {cleanup_error}")
         db.close()
 
 
+# -----------------------------
+# Translation Client
+# -----------------------------
+_session = None
+
+
+def get_translation_session() -> requests.Session:
+    """
+    Shared keep-alive session (connection pool) for API_URL. It does not
+    retry by itself: retries happen once, per batch, in _request_translations.
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=TRANSLATION_PARALLELISM)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
 
+def _batches(texts: list):
+    """Yield (start, end) index ranges within the segment/character limits."""
+    start, chars = 0, 0
+    for i, text in enumerate(texts):
+        size = len(text)
+        if i > start and (i - start >= TRANSLATION_BATCH_SIZE or chars + size > TRANSLATION_BATCH_CHARS):
+            yield start, i
+            start, chars = i, 0
+        chars += size
+    if start < len(texts):
+        yield start, len(texts)
 
 
-def translate_text(text: str, target_lang: str):
-    """Translate a given English text into the target language."""
-    
-    # Return empty if no text is provided
-    if not text:
-        return ""
-    
+def _request_translations(chunk: list, target_lang: str) -> list:
+    """
+    Translate one batch, retrying with exponential backoff + jitter.
+    Raises TranslationError once the retries are used up. Falls back to one
+    request per text if the API does not return a list.
+    """
+    attempt = 0
+    while True:
+        try:
+            response = get_translation_session().post(API_URL, json={
+                "q": chunk,
+                "source": "en",
+                "target": target_lang,
+                "format": "text"
+            }, timeout=TRANSLATION_TIMEOUT)
+            response.raise_for_status()
+            translated = response.json().get("translatedText")
+
+            if not isinstance(translated, list) or len(translated) != len(chunk):
+                translated = []
+                for text in chunk:
+                    single = get_translation_session().post(API_URL, data={
+                        "q": text,
+                        "source": "en",
+                        "target": target_lang,
+                        "format": "text"
+                    }, timeout=TRANSLATION_TIMEOUT)
+                    single.raise_for_status()
+                    translated.append(single.json().get("translatedText", ""))
+            return [text or "" for text in translated]
+
+        except Exception as e:
+            attempt += 1
+            if attempt > TRANSLATION_MAX_RETRIES:
+                raise TranslationError(
+                    f"Batch translation failed for '{target_lang}' ({len(chunk)} segments): {e}"
+                ) from e
+            delay = TRANSLATION_BACKOFF * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            print(f"⚠️ Batch translation for '{target_lang}' failed ({e}), retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def translate_batch(texts: list, target_lang: str, on_progress=None) -> list:
+    """
+    Translate many English texts into `target_lang`. Texts already in the
+    translation memory are not sent; the rest are de-duplicated and packed
+    several per request (`q` as a list). Output order matches the input.
+    `on_progress(done, total)` is called after every request.
+
+    Raises TranslationError if a batch still fails after its retries;
+    batches translated before that are kept in the translation memory.
+    """
+    known = lookup_translations(texts, target_lang)
+
+    # Ordered, de-duplicated texts still to translate
+    pending = list(dict.fromkeys(
+        key for key in map(normalize, texts) if key and key not in known
+    ))
+
+    fresh = {}
     try:
-        # Send POST request to the translation API
-        response = requests.post(API_URL, data={
-            "q": text,          # Text to translate
-            "source": "en",     # Source language
-            "target": target_lang,  # Target language (e.g., hi, fr)
-            "format": "text"    # Type of content
-        })
-        
-        # Raise error if response status is not OK
-        response.raise_for_status()
-        
-        # Return translated text from API response
-        return response.json().get("translatedText", "")
-    
-    except Exception as e:
-        # Print error for debugging if translation fails
-        print(f"Translation failed for '{target_lang}': {e}")
-        return ""
+        for start, end in _batches(pending):
+            chunk = pending[start:end]
+            fresh.update(zip(chunk, _request_translations(chunk, target_lang)))
+            if on_progress:
+                on_progress(end, len(pending))
+    finally:
+        store_translations(fresh, target_lang)
+
+    print(f"🧠 Translation memory '{target_lang}': {len(known)} hits, {len(pending)} translated")
+
+    known.update(fresh)
+    return [known.get(normalize(text), "") for text in texts]
+
+
+def iter_translated_segments(segments: list, languages: list, on_progress: dict = None, skip_failed: bool = False):
+    """
+    Translate Whisper segments into several languages concurrently and
+    yield (lang, [{"start", "end", "text"}, ...]) as each language finishes.
+    `on_progress` optionally maps a language to its progress callback.
+    A failed language raises, or with `skip_failed` is yielded as (lang, None)
+    while the other languages carry on.
+    """
+    if not languages:
+        return
+
+    on_progress = on_progress or {}
+    texts = [seg["text"] for seg in segments]
+    with ThreadPoolExecutor(max_workers=max(min(TRANSLATION_PARALLELISM, len(languages)), 1)) as pool:
+        futures = {
+            pool.submit(translate_batch, texts, lang, on_progress.get(lang)): lang
+            for lang in languages
+        }
+        for future in as_completed(futures):
+            lang = futures[future]
+            if skip_failed and future.exception() is not None:
+                print(f"❌ Translation to '{lang}' failed: {future.exception()}")
+                yield lang, None
+                continue
+            yield lang, [
+                {"start": seg["start"], "end": seg["end"], "text": text}
+                for seg, text in zip(segments, future.result())
+            ]
@@ -0,0 +1,114 @@
+import hashlib
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from Base import TranslationMemory
+from database import SessionLocal
+
+# ==============================================================
+# 🧠 Translation Memory (persistent translation cache)
+# ==============================================================
+# Stores every translated subtitle segment keyed by
+# (normalized source text, source language, target language), so repeated
+# phrases and re-uploaded lessons cost a lookup instead of an API call.
+#
+# Lookups run in the transcription pool processes, so hit counts are kept
+# in the table (TranslationMemory.hits) rather than in process memory.
+
+
+def normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+def lookup_translations(texts: list, target_lang: str, source_lang: str = "en") -> dict:
+    """
+    Return {normalized text: translation} for every text already in the
+    translation memory (one query), and bump their hit counters.
+    """
+    keys = {source_hash(t): normalize(t) for t in texts if normalize(t)}
+    if not keys:
+        return {}
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(TranslationMemory.id, TranslationMemory.source_hash, TranslationMemory.translated_text)
+            .filter(
+                TranslationMemory.source_hash.in_(list(keys)),
+                TranslationMemory.source_lang == source_lang,
+                TranslationMemory.target_lang == target_lang,
+            )
+            .all()
+        )
+        if rows:
+            db.query(TranslationMemory).filter(
+                TranslationMemory.id.in_([r.id for r in rows])
+            ).update({TranslationMemory.hits: TranslationMemory.hits + 1}, synchronize_session=False)
+            db.commit()
+    except Exception as e:
+        # A cache problem must never block translation
+        db.rollback()
+        print(f"⚠️ Translation memory lookup failed: {e}")
+        rows = []
+    finally:
+        db.close()
+
+    return {keys[r.source_hash]: r.translated_text for r in rows}
+
+
+def store_translations(pairs: dict, target_lang: str, source_lang: str = "en"):
+    """Save {source text: translation} pairs; existing entries are left as-is."""
+    values = [
+        {
+            "source_hash": source_hash(src),
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "source_text": normalize(src),
+            "translated_text": translated,
+            "hits": 0,
+        }
+        for src, translated in pairs.items()
+        if normalize(src) and translated
+    ]
+    if not values:
+        return
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert(TranslationMemory)
+            .values(values)
+            .on_conflict_do_nothing(constraint="_translation_memory_uc")
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Translation memory write failed: {e}")
+    finally:
+        db.close()
+
+
+def translation_memory_stats() -> dict:
+    """
+    Totals of the stored memory (shared by every worker process). Every
+    entry was stored after one miss, so hits / (hits + entries) is the
+    hit rate since the memory was started.
+    """
+    db = SessionLocal()
+    try:
+        entries, total_hits = db.query(
+            func.count(TranslationMemory.id), func.coalesce(func.sum(TranslationMemory.hits), 0)
+        ).one()
+    finally:
+        db.close()
+
+    total_hits = int(total_hits)
+    lookups = total_hits + entries
+    return {
+        "stored_entries": entries,
+        "stored_hits_total": total_hits,
+        "hit_rate": round(total_hits / lookups, 4) if lookups else 0.0,
+    }
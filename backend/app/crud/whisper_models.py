@@ -0,0 +1,133 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ==============================================================
+# 🎙️ Whisper Model Registry (one per worker process)
+# ==============================================================
+# Loading Whisper weights takes seconds and hundreds of MB, so each model
+# size is loaded once per process and reused across transcription jobs.
+#
+#   WHISPER_MODEL               default model size ("base")
+#   WHISPER_MAX_MODELS          how many sizes may stay loaded (LRU)
+#   WHISPER_MODEL_IDLE_SECONDS  unload a model unused for this long (0 = never)
+#   WHISPER_PRELOAD             comma-separated sizes to load when a transcription
+#                               worker process starts (the API process never loads Whisper)
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+WHISPER_MAX_MODELS = int(os.getenv("WHISPER_MAX_MODELS", "1"))
+WHISPER_MODEL_IDLE_SECONDS = int(os.getenv("WHISPER_MODEL_IDLE_SECONDS", "1800"))
+WHISPER_PRELOAD = [m.strip() for m in os.getenv("WHISPER_PRELOAD", "").split(",") if m.strip()]
+
+
+class WhisperModelRegistry:
+    def __init__(self, max_models: int = WHISPER_MAX_MODELS, idle_seconds: int = WHISPER_MODEL_IDLE_SECONDS):
+        self.max_models = max(max_models, 1)
+        self.idle_seconds = idle_seconds
+        self._models = OrderedDict()  # name -> [model, last_used]
+        self._lock = threading.Lock()
+        self._reaper = None
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, name: str = WHISPER_MODEL):
+        """Return the loaded model `name`, loading it on first use."""
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self._models.move_to_end(name)
+                self.hits += 1
+                return entry[0]
+
+            # Make room before loading so two large models never coexist needlessly
+            while len(self._models) >= self.max_models:
+                self._evict(next(iter(self._models)))
+
+            import whisper  # heavy (torch) — imported on first load only
+            start = time.perf_counter()
+            model = whisper.load_model(name)
+            print(f"🎙️ Loaded Whisper model '{name}' in {time.perf_counter() - start:.1f}s")
+
+            self._models[name] = [model, time.monotonic()]
+            self.loads += 1
+            self._start_reaper()
+            return model
+
+    def preload(self, names=None):
+        """Load the given model sizes (default: WHISPER_PRELOAD) ahead of the first job."""
+        for name in names if names is not None else WHISPER_PRELOAD:
+            self.get(name)
+
+    def evict_idle(self):
+        """Unload models that have not been used for `idle_seconds`."""
+        if self.idle_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for name in [n for n, (_, last_used) in self._models.items() if last_used < cutoff]:
+                self._evict(name)
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._models):
+                self._evict(name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": list(self._models),
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
+
+    # --- internals (caller holds the lock) ---
+    def _evict(self, name: str):
+        self._models.pop(name, None)
+        self.evictions += 1
+        gc.collect()
+        print(f"🧹 Unloaded Whisper model '{name}'")
+
+    def _start_reaper(self):
+        if self.idle_seconds <= 0 or self._reaper is not None:
+            return
+
+        def reap():
+            while True:
+                time.sleep(max(self.idle_seconds / 2, 1))
+                self.evict_idle()
+                with self._lock:
+                    if not self._models:
+                        self._reaper = None
+                        return
+
+        self._reaper = threading.Thread(target=reap, name="whisper-model-reaper", daemon=True)
+        self._reaper.start()
+
+
+# Process-wide registry
+whisper_models = WhisperModelRegistry()
+
+
+def get_whisper_model(name: str = WHISPER_MODEL):
+    """Shortcut for `whisper_models.get(name)`."""
+    return whisper_models.get(name)
+
+
+def preload_worker_models():
+    """
+    Process pool initializer: load WHISPER_PRELOAD in the transcription
+    worker that will actually use it. Failures are logged, never raised
+    (an initializer error would break the whole pool).
+    """
+    try:
+        whisper_models.preload()
+    except Exception as e:
+        print(f"⚠️ Whisper preload failed in worker {os.getpid()}: {e}")
@@ -1,14 +1,16 @@
 # main.py
-from fastapi import FastAPI, Depends, HTTPException,APIRouter
+from fastapi import FastAPI, Depends, HTTPException,APIRouter, Query, Response
 from sqlalchemy.orm import Session
-from database import Base, engine, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import Base, engine, get_db, get_async_read_db
 from app.crud.Analytics_crud import (
-    update_engagement,update_progress,fetch_learner_progress,fetch_course_report,log_mentor_interaction)
+    update_engagement,update_progress,fetch_learner_progress,fetch_course_report,log_mentor_interaction,
+    fetch_student_analytics, fetch_courses_analytics, STUDENT_STATUSES)
 from basemodels import (
     LearnerProgressBase, LearnerEngagementBase, MentorInteractionBase, CourseBase, ResponseMessage
 )
-from datetime import datetime, timedelta
-from Base import User,LearnerEngagement,LearnerProgress,Course
+from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 
@@ -42,13 +44,13 @@ def add_or_update_progress(progress: LearnerProgressBase, db: Session = Depends(
 
 
 @router.get("/progress/{learner_id}")
-def get_learner_progress(learner_id: int, db: Session = Depends(get_db)):
-    return fetch_learner_progress(db, learner_id)
+async def get_learner_progress(learner_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(fetch_learner_progress, learner_id)
 
 
 @router.get("/course-report/{course_id}")
-def get_course_report(course_id: int, db: Session = Depends(get_db)):
-    return fetch_course_report(db, course_id)
+async def get_course_report(course_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(fetch_course_report, course_id)
 
 
 # =========================================================
@@ -72,68 +74,29 @@ def mentor_interaction_log(log: MentorInteractionBase, db: Session = Depends(get
 # 👩‍🎓 Student Analytics (Progress + Engagement)
 # =========================================================
 @router.get("/students")
-def get_students(db: Session = Depends(get_db)):
-    learners = db.query(User).filter(User.role == "student").all()
-    result = []
-
-    for learner in learners:
-        # --- Progress ---
-        progress_record = (
-            db.query(LearnerProgress)
-            .filter(LearnerProgress.learner_id == learner.id)
-            .first()
-        )
-        progress = progress_record.progress_percent if progress_record else 0.0
-
-        # --- Engagement ---
-        engagement_record = (
-            db.query(LearnerEngagement)
-            .filter(LearnerEngagement.learner_id == learner.id)
-            .first()
-        )
-
-        last_active_at = None
-        if engagement_record:
-            if hasattr(engagement_record, "last_login"):
-                last_active_at = engagement_record.last_login
-            elif hasattr(engagement_record, "last_active"):
-                last_active_at = engagement_record.last_active
-            elif hasattr(engagement_record, "last_seen"):
-                last_active_at = engagement_record.last_seen
-
-        # --- Active/Inactive/Risk Status ---
-        now = datetime.utcnow()
-        active_status = (
-            "Active"
-            if last_active_at and last_active_at > now - timedelta(days=14)
-            else "Inactive"
-        )
-        risk_status = "At Risk" if progress < 50 else active_status
-
-        # --- Full Name ---
-        full_name = f"{learner.first_name} {learner.last_name or ''}".strip()
-
-        # # --- Mocked task data (optional for UI) ---
-        # total_tasks = 30
-        # tasks_completed = round((progress / 100) * total_tasks)
-
-        result.append({
-            "id": learner.id,
-            "name": full_name,
-            "email": learner.email,
-            "progress": progress,
-            "status": risk_status,  # Must exactly match "At Risk" etc.
-            "lastActive": (
-                last_active_at.strftime("%b %d, %Y")
-                if last_active_at else "N/A"
-            ),
-            # "tasksCompleted": tasks_completed,
-            # "totalTasks": total_tasks,
-        })
+async def get_students(
+    response: Response,
+    status: Optional[str] = Query(None, description="Active, Inactive or At Risk"),
+    after_id: Optional[int] = Query(None, description="Keyset cursor: last learner id of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if status and status not in STUDENT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of {list(STUDENT_STATUSES)}")
+
+    result = await db.run_sync(fetch_student_analytics, status=status, after_id=after_id, limit=limit)
+
+    # Cursor for the next page (only when the page is full)
+    if limit and len(result) == limit:
+        response.headers["X-Next-Cursor"] = str(result[-1]["id"])
 
     return result
 @router.get("/courses")
-def get_courses_analytics(db: Session = Depends(get_db)):
+async def get_courses_analytics(
+    start_date: Optional[datetime] = Query(None, description="Only count progress updated on/after this time"),
+    end_date: Optional[datetime] = Query(None, description="Only count progress updated on/before this time"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
     """
     Fetch analytics summary for all courses:
     - Total students
@@ -141,55 +104,7 @@ def get_courses_analytics(db: Session = Depends(get_db)):
     - Course status (Published/Unpublished/At Risk)
     - Activity breakdown (Completed/In Progress/Not Started)
     """
-    courses = db.query(Course).all()
-    result = []
-
-    for course in courses:
-        progress_records = (
-            db.query(LearnerProgress)
-            .filter(LearnerProgress.course_id == course.id)
-            .all()
-        )
-
-        total_learners = len(progress_records)
-
-        avg_progress = (
-            round(sum([p.progress_percent for p in progress_records]) / total_learners, 2)
-            if total_learners > 0 else 0.0
-        )
-
-        # Determine course status
-        status = (
-            "Published"
-            if str(course.publish_status).lower() == "published"
-            else "Unpublished"
-        )
-        risk_status = "At Risk" if avg_progress < 50 else status
-
-        # 🟢 Learner activity breakdown
-        completed = len([p for p in progress_records if p.progress_percent >= 90])
-        in_progress = len([p for p in progress_records if 0 < p.progress_percent < 90])
-        not_started = total_learners - (completed + in_progress)
-
-        activity_data = [
-            {"name": "Completed", "value": completed},
-            {"name": "In Progress", "value": in_progress},
-            {"name": "Not Started", "value": not_started},
-        ]
-
-        result.append({
-            "title": course.title,
-            "description": course.description or "",
-            "createdAt": course.created_at.strftime("%b %d, %Y") if course.created_at else "N/A",
-            "stats": {
-                "totalStudents": total_learners,
-                "avgProgress": avg_progress,
-                "status": risk_status
-            },
-            "activity": activity_data
-        })
-
-    return result
+    return await db.run_sync(fetch_courses_analytics, start_date=start_date, end_date=end_date)
 # from app.crud.auth import verify_password,create_access_token
 
 # from basemodels import LoginRequest
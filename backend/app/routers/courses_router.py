@@ -15,7 +15,9 @@ from app.crud.courses_crud import (
     upload_to_minio
 )
 from basemodels import CourseBase, CourseUpdate,CourseOut
-from database import get_db
+from database import get_db, get_async_read_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.dashboard_crud import mark_dashboard_stale
 from Base import PublishStatusEnum, Course,UserRole
 from app.crud.auth import get_current_user
 from Base import User
@@ -46,10 +48,14 @@ def get_public_banner_url(path: str) -> str:
 # 1️⃣ Dashboard: Get All Courses with Mentor Info
 # =====================================================
 @router.get("/courses")
-def get_all_courses(db: Session = Depends(get_db)):
+async def get_all_courses(db: AsyncSession = Depends(get_async_read_db)):
     """
     Returns list of all courses with mentor, publish status, and banner image.
     """
+    return await db.run_sync(_build_courses_dashboard)
+
+
+def _build_courses_dashboard(db: Session):
     courses = db.query(Course).all()
     if not courses:
         raise HTTPException(status_code=404, detail="No courses found")
@@ -134,7 +140,7 @@ def create_course_endpoint(
 
 # ------------------ UPDATE COURSE ------------------ #
 @router.put("/courses/{course_id}")
-async def update_course_route(
+def update_course_route(
     course_id: int,
     title: str = Form(None),
     description: str = Form(None),
@@ -160,20 +166,20 @@ def delete_course_endpoint(course_id: int, db: Session = Depends(get_db)):
 
 # ------------------ GET COURSE BY ID ------------------ #
 @router.get("/{course_id}", summary="Get a single course by ID")
-def get_course(course_id: int, db: Session = Depends(get_db)):
+async def get_course(course_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Get course details by ID (with modules and lessons).
     """
-    return get_course_by_id(course_id, db)
+    return await db.run_sync(lambda s: get_course_by_id(course_id, s))
 
 
 # ------------------ GET ALL UNPUBLISHED COURSES ------------------ #
 @router.get("/unpublished/all", summary="Get all unpublished courses")
-def list_unpublished_courses(db: Session = Depends(get_db)):
+async def list_unpublished_courses(db: AsyncSession = Depends(get_async_read_db)):
     """
     Fetch all courses that are not yet published.
     """
-    return get_all_unpublished_courses(db)
+    return await db.run_sync(get_all_unpublished_courses)
 
 
 # ------------------ UPDATE COURSE STATUS ------------------ #
@@ -209,6 +215,7 @@ def update_course_banner(
 
         # ✅ Update database record
         db_course.banner_url = banner_url
+        mark_dashboard_stale(db, "courses")
         db.commit()
         db.refresh(db_course)
 
@@ -1,6 +1,7 @@
 from fastapi import (
     APIRouter, Depends, UploadFile, File, HTTPException, Form
 )
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session,joinedload
 from app.crud import evaluation_crud
 from database import get_db
@@ -11,6 +12,10 @@ from app.crud.certificate_generator import generate_certificate
 from datetime import datetime
 from app.crud.evaluation_crud import get_leaderboard
 from app.crud.evaluation_crud import recalculate_leaderboard_and_certification
+from app.crud.dashboard_crud import mark_dashboard_stale
+from app.crud.grading_queue import (
+    queue_assignment_grading, lease_expired, AI_GRADING, AI_PENDING
+)
 # ============================================================
 # 📘 Router Setup
 # ============================================================
@@ -28,7 +33,8 @@ async def create_submission(
     db: Session = Depends(get_db)
 ):
     """
-    Student uploads assignment → AI automatically grades it.
+    Student uploads assignment → AI grading is queued.
+    Poll /evaluation/submission/{id}/ai for the score and feedback.
     """
     try:
         submission_data = type("obj", (object,), {
@@ -36,16 +42,21 @@ async def create_submission(
             "student_id": student_id
         })
 
-        result = await evaluation_crud.create_submission(db, submission_data, file)
+        # Stream the upload on the event loop, then do the blocking DB work in the threadpool
+        file_url = await evaluation_crud.save_uploaded_file(file) if file else None
+        result = await run_in_threadpool(evaluation_crud.create_submission, db, submission_data, file_url)
 
         return {
-            "message": "Submission uploaded & graded successfully",
+            "message": "Submission uploaded, AI grading in progress",
             "submission": {
                 "id": result.id,
+                "ai_status": result.ai_status,
                 "ai_score": result.ai_score,
                 "ai_feedback": result.ai_feedback
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -87,6 +98,57 @@ def view_submission(submission_id: int, db: Session = Depends(get_db)):
     return submission
 
 
+# ============================================================
+# ⏳ AI GRADING STATUS (polling)
+# ============================================================
+@router.get("/submission/{submission_id}/ai")
+def submission_ai_result(submission_id: int, db: Session = Depends(get_db)):
+    """
+    AI grading status of a submission; ai_score / ai_feedback are set
+    once ai_status is "graded".
+    """
+    row = (
+        db.query(
+            Submission.id, Submission.ai_status, Submission.ai_score,
+            Submission.ai_feedback, Submission.ai_claimed_at,
+        )
+        .filter(Submission.id == submission_id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    ai_status = row.ai_status
+    # Claimed by a worker that never finished (killed mid-batch): the
+    # dispatcher returns it to the queue on its next poll, report it pending
+    if ai_status == AI_GRADING and lease_expired(row.ai_claimed_at):
+        ai_status = AI_PENDING
+
+    return {
+        "id": row.id,
+        "ai_status": ai_status,
+        "ai_score": row.ai_score,
+        "ai_feedback": row.ai_feedback,
+    }
+
+
+# ============================================================
+# 📦 BULK AI GRADING (assignment deadline)
+# ============================================================
+@router.post("/assignment/{assignment_id}/grade-pending")
+def grade_assignment_pending(
+    assignment_id: int,
+    include_failed: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue every ungraded (and by default failed) submission of an
+    assignment for batched AI grading.
+    """
+    queued = queue_assignment_grading(db, assignment_id, include_failed)
+    return {"message": "AI grading queued", "assignment_id": assignment_id, "queued": queued}
+
+
 @router.post("/submission/{submission_id}/grade")
 def grade_submission(
     submission_id: int,
@@ -229,7 +291,7 @@ def leaderboard(order: str = "asc", db: Session = Depends(get_db)):
 # 🧩 MENTOR FULL REVIEW (GRADE + TEXT FEEDBACK ONLY)
 # ============================================================
 @router.post("/submission/{submission_id}/full-review")
-async def full_review_submission(
+def full_review_submission(
     submission_id: int,
     mentor_id: int = Form(...),
     mentor_score: int = Form(...),
@@ -322,6 +384,7 @@ def full_review_submission(
 
     # Update mentor score
     submission.mentor_score = mentor_score
+    mark_dashboard_stale(db, "evaluations")
     db.commit()
 
     feedback = FeedbackCreate(
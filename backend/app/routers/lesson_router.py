@@ -1,18 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, Form, Query, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Query, Depends, HTTPException, Request
 from fastapi.responses import Response, FileResponse, JSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
 # 🧩 Local imports
-from database import get_db
+from database import get_db, get_async_read_db
 from app.crud.lesson_crud import save_lesson_video, get_all_lessons, get_lesson_by_id
 from Base import Lesson, LessonSubtitle
 from basemodels import SubtitleSchema
 from minio import Minio
 from dotenv import load_dotenv
-from app.crud.translate_crud  import generate_subtitles_background
+from app.crud.subtitle_format import SUBTITLE_FORMATS, vtt_to_segments
+from app.crud.subtitle_storage import remove_lesson_subtitles
+from app.crud.subtitle_cache import rendered_subtitles
+from app.crud.transcription_queue import (
+    enqueue_transcription, SUBTITLE_QUEUED, SUBTITLE_RUNNING, SUBTITLE_DONE, SUBTITLE_FAILED
+)
 
 # 📘 Initialize API router
 router = APIRouter()
@@ -28,24 +36,18 @@ def upload_lesson_video(
     description: str = Form(...),
     file: UploadFile = File(...),
     languages: str = Query("en,hi,fr,es"),
-    background_tasks: BackgroundTasks = None,
     db: Session = Depends(get_db),
 ):
-    """Upload new lesson file, save to MinIO & DB, enable versioning, trigger subtitles."""
+    """Upload new lesson file, save to MinIO & DB, enable versioning, queue subtitles."""
     result = save_lesson_video(db=db, module_id=module_id, file=file, description=description)
 
     lesson_id = result["lesson_id"]
     file_url = result["file_url"]
     content_type = result["content_type"]
 
-    if content_type == "video" and background_tasks:
-        background_tasks.add_task(
-            generate_subtitles_background,
-            lesson_id,
-            file_url,
-            languages
-        )
-        subtitles_status = "processing"
+    # 🎬 Queue subtitle generation in the transcription worker pool
+    if content_type == "video":
+        subtitles_status = enqueue_transcription(db, lesson_id, file_url, languages)
     else:
         subtitles_status = "skipped"
 
@@ -69,11 +71,11 @@ def update_lesson_video(
     description: str = Form(...),
     file: UploadFile = File(...),
     languages: str = Query("en,hi"),  # Default translation languages
-    background_tasks: BackgroundTasks = None,
     db: Session = Depends(get_db),
 ):
     """
     Update an existing lesson file and regenerate subtitles if it's a video.
+    Only languages whose subtitles do not match the uploaded file are regenerated.
     """
     # ✅ Save updated lesson file (this handles MinIO upload & versioning)
     result = save_lesson_video(
@@ -89,15 +91,9 @@ def update_lesson_video(
     file_url = result["file_url"]
     content_type = result["content_type"]
 
-    # 🎬 Trigger subtitle regeneration if video
-    if content_type == "video" and background_tasks:
-        background_tasks.add_task(
-            generate_subtitles_background,
-            lesson_id,
-            file_url,
-            languages
-        )
-        subtitles_status = "processing"
+    # 🎬 Queue subtitle regeneration if video
+    if content_type == "video":
+        subtitles_status = enqueue_transcription(db, lesson_id, file_url, languages)
     else:
         subtitles_status = "skipped"
 
@@ -106,6 +102,7 @@ def update_lesson_video(
         "lesson_id": lesson_id,
         "description": description,
         "content_url": file_url,  # Direct MinIO URL
+        "file_unchanged": result["unchanged"],
         "subtitles_status": subtitles_status
     }
 
@@ -114,22 +111,22 @@ def update_lesson_video(
 # 🟦 Get All Lessons
 # =====================================================
 @router.get("/all")
-def get_all_lessons_api(db: Session = Depends(get_db)):
+async def get_all_lessons_api(db: AsyncSession = Depends(get_async_read_db)):
     """
     Fetch all lessons available in the database.
     """
-    return get_all_lessons(db)
+    return await db.run_sync(get_all_lessons)
 
 
 # =====================================================
 # 🟪 Get Lesson by ID
 # =====================================================
 @router.get("/{lesson_id}")
-def get_lesson_by_id_api(lesson_id: int, db: Session = Depends(get_db)):
+async def get_lesson_by_id_api(lesson_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Fetch a specific lesson by its ID.
     """
-    return get_lesson_by_id(lesson_id, db)
+    return await db.run_sync(lambda s: get_lesson_by_id(lesson_id, s))
 
 
 # =====================================================
@@ -160,56 +157,176 @@ def get_video(lesson_id: int, db: Session = Depends(get_db)):
 # 🗣️ Get All Subtitles for a Lesson
 # =====================================================
 @router.get("/subtitle/{lesson_id}/all")
-def get_all_subtitles(lesson_id: int, db: Session = Depends(get_db)):
+async def get_all_subtitles(lesson_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Returns all subtitle languages and their file URLs for a given lesson.
+    `file_url` points at the published MinIO file when there is one
+    (no API/DB work for the player), otherwise at the API route.
     """
-    # 🔍 Fetch all subtitle records
-    subtitles = db.query(LessonSubtitle).filter(LessonSubtitle.lesson_id == lesson_id).all()
+    # 🔍 Fetch subtitle records (without the subtitle text itself)
+    subtitles = (
+        await db.execute(
+            select(LessonSubtitle.id, LessonSubtitle.language, LessonSubtitle.status, LessonSubtitle.subtitle_url)
+            .where(LessonSubtitle.lesson_id == lesson_id)
+        )
+    ).all()
     if not subtitles:
         raise HTTPException(status_code=404, detail="No subtitles found")
 
     # 📋 Format subtitle info
-    result = [
-        {
+    result = []
+    for sub in subtitles:
+        api_url = f"/api/v1/lessons/subtitle/{lesson_id}/{sub.language}"  # URL to access individual subtitle
+        result.append({
             "id": sub.id,
             "language": sub.language,
-            "file_url": f"/api/v1/lessons/subtitle/{lesson_id}/{sub.language}"  # URL to access individual subtitle
+            "status": sub.status,
+            "file_url": sub.subtitle_url or api_url,
+            "api_url": api_url,
+        })
+    return result
+
+
+# =====================================================
+# ⏳ Subtitle Generation Status (cheap polling)
+# =====================================================
+# Declared before /subtitle/{lesson_id}/{language} so "status" is not taken as a language.
+@router.get("/subtitle/{lesson_id}/status")
+async def get_subtitle_status(lesson_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Per-language subtitle job status and progress for a lesson.
+    Reads only the status columns (never the subtitle text).
+    """
+    rows = (
+        await db.execute(
+            select(
+                LessonSubtitle.language,
+                LessonSubtitle.status,
+                LessonSubtitle.progress,
+                LessonSubtitle.created_at,
+            )
+            .where(LessonSubtitle.lesson_id == lesson_id)
+            .order_by(LessonSubtitle.language)
+        )
+    ).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="No subtitles found")
+
+    languages = [
+        {
+            "language": r.language,
+            "status": r.status,
+            "progress": 100 if r.status in (SUBTITLE_DONE, "generated") else (r.progress or 0),
+            "ready": r.status in (SUBTITLE_DONE, "generated"),
+            "updated_at": r.created_at,
         }
-        for sub in subtitles
+        for r in rows
     ]
-    return result
+
+    statuses = {l["status"] for l in languages}
+    if statuses & {SUBTITLE_QUEUED, SUBTITLE_RUNNING}:
+        overall = SUBTITLE_RUNNING if SUBTITLE_RUNNING in statuses else SUBTITLE_QUEUED
+    elif SUBTITLE_FAILED in statuses:
+        overall = SUBTITLE_FAILED
+    else:
+        overall = SUBTITLE_DONE
+
+    return {
+        "lesson_id": lesson_id,
+        "status": overall,
+        "progress": sum(l["progress"] for l in languages) // len(languages),
+        "languages": languages,
+    }
 
 
 # =====================================================
 # 📜 Get Subtitle by Language (VTT Format)
 # =====================================================
+# Browsers may reuse a subtitle for this long before revalidating
+SUBTITLE_MAX_AGE = int(os.getenv("SUBTITLE_MAX_AGE", "300"))
+
+
+def _not_modified(request: Request, etag: str, modified: datetime) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current version."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return etag in tags or "*" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
 @router.get("/subtitle/{lesson_id}/{language}")
-def get_subtitle(lesson_id: int, language: str, db: Session = Depends(get_db)):
+async def get_subtitle(
+    lesson_id: int,
+    language: str,
+    request: Request,
+    format: str = Query("vtt", pattern="^(vtt|srt|json)$"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
     """
-    Serve a single subtitle file in VTT format for the specified language.
+    Serve a single subtitle file for the specified language.
+    VTT is stored ready to serve; SRT / JSON cues are converted from it.
+    Responses carry ETag / Last-Modified; a matching conditional request
+    gets 304 without the subtitle text ever being loaded, and documents
+    served before are reused from the rendered cache (keyed by ETag).
     """
-    # 🔍 Find subtitle by lesson ID and language
-    subtitle = (
-        db.query(LessonSubtitle)
-        .filter(LessonSubtitle.lesson_id == lesson_id)
-        .filter(LessonSubtitle.language == language)
-        .first()
-    )
+    # 🔍 Find subtitle version by lesson ID and language (small columns only)
+    version = (
+        await db.execute(
+            select(
+                LessonSubtitle.id,
+                LessonSubtitle.created_at,
+                (LessonSubtitle.subtitle_text != "").label("has_text"),
+            )
+            .where(LessonSubtitle.lesson_id == lesson_id)
+            .where(LessonSubtitle.language == language)
+            .limit(1)
+        )
+    ).first()
 
-    # ⚠️ Raise error if not found
-    if not subtitle:
+    # ⚠️ Raise error if not found (or still queued without any text)
+    if not version or not version.has_text:
         raise HTTPException(status_code=404, detail="Subtitle not found")
 
-    # 📄 Build VTT content
-    vtt_content = f"WEBVTT\n\n{subtitle.subtitle_text}"
+    render, media_type, extension = SUBTITLE_FORMATS[format]
+    modified = (version.created_at or datetime(1970, 1, 1)).replace(tzinfo=timezone.utc, microsecond=0)
+    etag = f'"{version.id}-{int(modified.timestamp())}-{format}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(modified, usegmt=True),
+        "Cache-Control": f"public, max-age={SUBTITLE_MAX_AGE}",
+        "Content-Disposition": f'inline; filename="subtitle_{lesson_id}_{language}.{extension}"',
+    }
 
-    # 📤 Return response as inline VTT file
-    return Response(
-        content=vtt_content,
-        media_type="text/vtt",
-        headers={"Content-Disposition": f'inline; filename="subtitle_{lesson_id}_{language}.vtt"'}
-    )
+    # ♻️ Client already has this version
+    if _not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+
+    # 🗃️ Served this version before — no text query, no re-rendering
+    # (keyed on the full timestamp: the ETag only has whole seconds)
+    cache_key = f"{version.id}-{version.created_at}-{format}"
+    content = rendered_subtitles.get(cache_key)
+    if content is None:
+        subtitle_text = await db.scalar(select(LessonSubtitle.subtitle_text).where(LessonSubtitle.id == version.id))
+        if not subtitle_text:
+            raise HTTPException(status_code=404, detail="Subtitle not found")
+
+        # 📄 Stored text is already a complete WebVTT document
+        if format == "vtt":
+            content = subtitle_text
+        else:
+            content = render(vtt_to_segments(subtitle_text))
+        rendered_subtitles.put(cache_key, content)
+
+    # 📤 Return response as inline subtitle file
+    return Response(content=content, media_type=media_type, headers=headers)
 
 
 # =====================================================
@@ -272,6 +389,9 @@ def delete_lesson_api(lesson_id: int, db: Session = Depends(get_db)):
         except Exception as e:
             print(f"⚠️ Failed to delete file from MinIO: {e}")
 
+    # ✅ Delete published subtitle files
+    remove_lesson_subtitles(lesson_id)
+
     # ✅ Delete lesson record from database
     db.delete(lesson)
     db.commit()
@@ -282,11 +402,11 @@ def delete_lesson_api(lesson_id: int, db: Session = Depends(get_db)):
 # 🟦 Get Lessons by Module ID
 # =====================================================
 @router.get("/")
-def get_lessons_by_module(module_id: int, db: Session = Depends(get_db)):
+async def get_lessons_by_module(module_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """
     Fetch all lessons belonging to a specific module.
     """
-    lessons = db.query(Lesson).filter(Lesson.module_id == module_id).all()
+    lessons = (await db.scalars(select(Lesson).where(Lesson.module_id == module_id))).all()
     if not lessons:
         raise HTTPException(status_code=404, detail="No lessons found for this module")
 
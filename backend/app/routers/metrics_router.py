@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Header, HTTPException
+from typing import Optional
+from dotenv import load_dotenv
+import os
+import hmac
+from pool_metrics import get_pool_metrics
+from startup_timing import boot_timer
+from app.crud.translation_memory import translation_memory_stats
+from app.crud.grading_engine import grading_engine
+from app.crud.grading_cache import grading_cache_stats
+
+load_dotenv()
+
+# Shared secret callers must send as X-Internal-Token. Without it configured
+# the metrics endpoints are disabled (404), never public.
+INTERNAL_METRICS_TOKEN = os.getenv("INTERNAL_METRICS_TOKEN")
+
+router = APIRouter()
+
+
+def _check_token(token: Optional[str]):
+    if not INTERNAL_METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token.encode(), INTERNAL_METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+# =====================================================
+# 🔌 Database Connection Pool Metrics
+# =====================================================
+@router.get("/db-pool")
+def db_pool_metrics(x_internal_token: Optional[str] = Header(None)):
+    """
+    Checkout latency, in-use / overflow counts and timeouts
+    for every database connection pool in this worker.
+    """
+    _check_token(x_internal_token)
+    return {"pools": get_pool_metrics()}
+
+
+# =====================================================
+# ⏱️ Worker Boot Timing
+# =====================================================
+@router.get("/boot")
+def boot_timing(x_internal_token: Optional[str] = Header(None)):
+    """How long each startup phase of this worker took."""
+    _check_token(x_internal_token)
+    return boot_timer.report()
+
+
+# =====================================================
+# 🧠 Translation Memory Hit Rate
+# =====================================================
+@router.get("/translation-cache")
+def translation_cache_metrics(x_internal_token: Optional[str] = Header(None)):
+    """
+    Translation memory totals (shared by all transcription workers):
+    stored entries, hits and the overall hit rate.
+    """
+    _check_token(x_internal_token)
+    return translation_memory_stats()
+
+
+# =====================================================
+# 🧮 AI Grading Engine
+# =====================================================
+@router.get("/grading")
+def grading_metrics(x_internal_token: Optional[str] = Header(None)):
+    """
+    Grading engine counters for this worker (only the grading leader
+    calls the model): requests, retries, failures,
+    time spent waiting on the rate limit and per-submission latency,
+    plus grading cache hit rate.
+    """
+    _check_token(x_internal_token)
+    return {**grading_engine.stats(), "cache": grading_cache_stats()}
@@ -233,6 +233,7 @@ class SubmissionResponse(BaseModel):
     file_url: Optional[str]
     mentor_score: Optional[int]
     ai_score: Optional[int]
+    ai_status: Optional[str] = None
     created_at: datetime
     feedbacks: List[FeedbackResponse] = []
 
@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
+import time
+from fastapi import Request
 from dotenv import load_dotenv
+from pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument_engine
 
 # ==============================================================
 # Load environment variables from .env file
@@ -24,17 +28,102 @@ DATABASE_URL = (
     f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
+# Same database through the asyncpg driver (used by the async session)
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# Optional read replica (same credentials/database name). Leave
+# DB_REPLICA_HOST unset to send all traffic to the primary.
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+DB_REPLICA_PORT = os.getenv("DB_REPLICA_PORT", DB_PORT)
+ASYNC_REPLICA_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}"
+)
+
+# Read-your-writes: a successful mutation returns an `X-Last-Write` header
+# (write time); clients echo it on their next requests and those reads
+# stay on the primary for this many seconds (covers replica lag). A header
+# instead of a cookie, so it also works for cross-origin calls without
+# credentials. Set to 0 to disable.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+LAST_WRITE_HEADER = "X-Last-Write"
+
 # ==============================================================
 # SQLAlchemy Engine & Session Configuration
 # ==============================================================
 
+# Pool tuning (per worker process):
+#   DB_POOL_SIZE      persistent connections kept open
+#   DB_MAX_OVERFLOW   extra connections allowed under burst load
+#   DB_POOL_TIMEOUT   seconds to wait for a free connection before failing
+#   DB_POOL_RECYCLE   seconds after which a connection is replaced
+#   DB_POOL_PRE_PING  test connections on checkout (drops stale ones)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
 # create_engine() establishes the connection to the database.
 # You can set echo=True for debugging to view all executed SQL queries.
-engine = create_engine(DATABASE_URL, future=True)
+engine = create_engine(
+    DATABASE_URL,
+    future=True,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+# Pool checkout / overflow / timeout metrics (see /internal/metrics/db-pool)
+instrument_engine(engine, "primary")
 
 # Session factory configuration
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ==============================================================
+# Async Engine & Session (asyncpg)
+# ==============================================================
+# Used by the hot read routers so DB waits do not block the event loop.
+# The async engine has its own pool with the same DB_POOL_* settings.
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+instrument_engine(async_engine.sync_engine, "primary_async")
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read replica (async only — used by the GET routers)
+replica_async_engine = None
+AsyncReplicaSessionLocal = None
+if DB_REPLICA_HOST:
+    replica_async_engine = create_async_engine(
+        ASYNC_REPLICA_DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    instrument_engine(replica_async_engine.sync_engine, "replica_async")
+
+    AsyncReplicaSessionLocal = async_sessionmaker(
+        bind=replica_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
 # Base class for ORM models
 Base = declarative_base()
 
@@ -49,3 +138,41 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ==============================================================
+# Async Database Dependency for FastAPI
+# ==============================================================
+# Use in `async def` handlers. Existing sync crud functions can be reused
+# via `await db.run_sync(func, ...)`, which passes a sync Session facade.
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ==============================================================
+# Read-Only Database Dependency (replica routing)
+# ==============================================================
+# GET handlers use this instead of get_async_db. Requests go to the
+# replica when one is configured, except when the client wrote recently
+# (echoed `X-Last-Write` header) or asks for `X-Consistency: strong`.
+
+def wants_primary(request: Request) -> bool:
+    if request.headers.get("X-Consistency", "").lower() == "strong":
+        return True
+    try:
+        last_write = float(request.headers.get(LAST_WRITE_HEADER))
+    except (TypeError, ValueError):
+        return False
+    return time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
+async def get_async_read_db(request: Request):
+    if AsyncReplicaSessionLocal is None or wants_primary(request):
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = AsyncReplicaSessionLocal
+
+    async with session_factory() as db:
+        yield db
@@ -0,0 +1,92 @@
+"""
+Import-time / memory benchmark for an API worker.
+
+    python import_benchmark.py              # report for `import main`
+    python import_benchmark.py --top 25     # show more modules
+    python import_benchmark.py --max-ms 1500 --max-rss-mb 250   # fail if over budget
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and
+reports total import time, the slowest modules (cumulative), whether any
+heavy SDK was pulled in at boot, and the worker's peak RSS after import.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Modules that should only ever load on first use, never at worker boot
+HEAVY_MODULES = (
+    "torch", "whisper", "google.generativeai", "openai",
+    "PyPDF2", "docx", "firebase_admin", "reportlab",
+)
+
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# Child prints its peak RSS (KiB on Linux, bytes on macOS) after importing
+CHILD_CODE = (
+    "import {module}, resource, sys; "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, sys.platform)"
+)
+
+
+def run(module: str):
+    env = dict(os.environ, FAST_BOOT="true")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE.format(module=module)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"❌ import {module} failed")
+
+    modules = []  # (name, self_us, cumulative_us, depth)
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+
+    rss_raw, platform = proc.stdout.split()
+    rss_mb = int(rss_raw) / (1024 * 1024 if platform == "darwin" else 1024)
+    return modules, rss_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if total import time exceeds this")
+    parser.add_argument("--max-rss-mb", type=float, default=None, help="fail if peak RSS exceeds this")
+    args = parser.parse_args()
+
+    modules, rss_mb = run(args.module)
+    total_ms = sum(m[2] for m in modules if m[3] == 0) / 1000
+    loaded = {m[0] for m in modules}
+    heavy = sorted(h for h in HEAVY_MODULES if h in loaded)
+
+    print(f"⏱️ import {args.module}: {total_ms:.1f} ms total, peak RSS {rss_mb:.1f} MB")
+    print(f"\nSlowest {args.top} modules (cumulative):")
+    for name, self_us, cumulative_us, _ in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"   {cumulative_us / 1000:>9.1f} ms  (self {self_us / 1000:>7.1f} ms)  {name}")
+
+    if heavy:
+        print(f"\n⚠️ Heavy modules loaded at boot: {', '.join(heavy)}")
+    else:
+        print("\n✅ No heavy ML / cloud SDK modules loaded at boot")
+
+    failed = False
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"❌ Import time {total_ms:.1f} ms exceeds budget {args.max_ms} ms")
+        failed = True
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        print(f"❌ Peak RSS {rss_mb:.1f} MB exceeds budget {args.max_rss_mb} MB")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
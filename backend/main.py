@@ -1,31 +1,84 @@
+from startup_timing import boot_timer
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from database import Base, engine
-from app.routers import (
-    courses_router,
-    mentor_router,
-    lesson_router,
-    modules_router,
-    materials_router,
-    assignment_router,
-    evaluation_router,
-    certificate_router,
-    role_aut_router,
-    Analytics_router,dashboard
-)
+
+with boot_timer.phase("import_database"):
+    from database import (
+        SessionLocal, AsyncReplicaSessionLocal, READ_YOUR_WRITES_SECONDS, LAST_WRITE_HEADER
+    )
+    from migrate import run_migrations
+
+with boot_timer.phase("import_routers"):
+    from app.crud.transcription_queue import requeue_orphaned_transcriptions, shutdown_transcription_pool
+    from app.crud.grading_queue import requeue_pending_grading, shutdown_grading_pool
+    from app.crud.text_extraction import shutdown_extraction_pool
+    from app.routers import (
+        courses_router,
+        mentor_router,
+        lesson_router,
+        modules_router,
+        materials_router,
+        assignment_router,
+        evaluation_router,
+        certificate_router,
+        role_aut_router,
+        Analytics_router,dashboard,
+        metrics_router
+    )
 
 import os
+import time
+import asyncio
 
 # ==============================================================
 # 🧩 Database Setup
 # ==============================================================
-# Automatically create all database tables based on SQLAlchemy models
-Base.metadata.create_all(bind=engine)
+# Schema creation is a separate step (`python migrate.py`). With
+# FAST_BOOT=true workers skip it entirely; otherwise the same migrations
+# run at startup. They only read the catalog unless something is missing,
+# so an up-to-date schema is never locked by a worker boot.
+FAST_BOOT = os.getenv("FAST_BOOT", "False").lower() == "true"
+
+
+def _requeue(requeue, what: str):
+    db = SessionLocal()
+    try:
+        requeue(db)
+    except Exception as e:
+        # Never block startup on this (e.g. schema not migrated yet)
+        print(f"⚠️ Could not re-queue {what}: {e}")
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not FAST_BOOT:
+        with boot_timer.phase("create_schema"):
+            run_migrations()
+
+    # Resume AI grading and subtitle jobs left unfinished by the previous run
+    with boot_timer.phase("requeue_grading"):
+        await asyncio.to_thread(_requeue, requeue_pending_grading, "pending AI grading")
+    with boot_timer.phase("requeue_transcriptions"):
+        await asyncio.to_thread(_requeue, requeue_orphaned_transcriptions, "unfinished transcription jobs")
+
+    boot_timer.finish()
+    boot_timer.print_report()
+    yield
+
+    # Stop transcription / extraction worker processes and grading threads
+    shutdown_transcription_pool()
+    shutdown_grading_pool()
+    shutdown_extraction_pool()
 
 # ==============================================================
 # 🚀 Initialize FastAPI App
 # ==============================================================
-app = FastAPI(title="Mentor-Course-Lesson Management API")
+with boot_timer.phase("create_app"):
+    app = FastAPI(title="Mentor-Course-Lesson Management API", lifespan=lifespan)
 
 # Enable CORS for frontend integration
 app.add_middleware(
@@ -34,8 +87,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by the frontend: read-your-writes marker and keyset pagination cursor
+    expose_headers=[LAST_WRITE_HEADER, "X-Next-Cursor"],
 )
 
+# Read-your-writes: tell the client when it last mutated data. Clients send
+# the value back as an `X-Last-Write` request header so their next reads
+# skip the (possibly lagging) read replica.
+if AsyncReplicaSessionLocal is not None and READ_YOUR_WRITES_SECONDS > 0:
+    @app.middleware("http")
+    async def mark_last_write(request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.headers[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+        return response
+
 # ==============================================================
 # 🔗 Main API Router
 # ==============================================================
@@ -68,6 +134,9 @@ app.include_router(certificate_router.router, prefix="/certificates", tags=["Cer
 app.include_router(Analytics_router.router, prefix="/analytics", tags=["Analytics"])
 app.include_router(dashboard.router, prefix="/mentor/dashboard", tags=["Dashboard"])
 
+# Internal metrics (per worker)
+app.include_router(metrics_router.router, prefix="/internal/metrics", tags=["Internal"])
+
 # ==============================================================
 # 💚 Health Check Endpoint
 # ==============================================================
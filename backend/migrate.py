@@ -0,0 +1,96 @@
+"""
+Schema / migration step.
+
+Run once per deploy, before starting the API workers:
+
+    python migrate.py
+
+Creates any missing tables and indexes defined in Base.py, then adds the
+columns / indexes that were introduced on tables that already existed
+(`create_all` never alters an existing table). The catalog is read first
+and DDL (which takes ACCESS EXCLUSIVE locks) only runs for what is
+missing, so on an up-to-date schema the step is read-only and safe to
+run on every deploy or worker start. Workers started with FAST_BOOT=true
+skip it entirely.
+"""
+import time
+
+from sqlalchemy import text
+
+from database import Base as DeclarativeBase, engine
+import Base  # noqa: F401  (registers every model on the metadata)
+
+# Columns added to existing tables, in the order they were introduced:
+# (table, column, column DDL)
+ADDED_COLUMNS = [
+    ("lessons", "content_hash", "VARCHAR(64)"),
+    ("lesson_subtitles", "source_hash", "VARCHAR(64)"),
+    ("lesson_subtitles", "progress", "INTEGER DEFAULT 0"),
+    ("submissions", "ai_status", "VARCHAR(20)"),
+    ("submissions", "ai_latency_ms", "INTEGER"),
+    ("submissions", "ai_claimed_at", "TIMESTAMP WITHOUT TIME ZONE"),
+]
+
+# Indexes on those columns: (index name, table, columns)
+ADDED_INDEXES = [
+    ("ix_lessons_content_hash", "lessons", "content_hash"),
+    ("ix_submissions_ai_status", "submissions", "ai_status"),
+]
+
+# Unique constraints added to existing tables: (constraint name, table,
+# columns, which duplicate to keep). Older duplicates are deleted first.
+ADDED_UNIQUE_CONSTRAINTS = [
+    ("_lesson_subtitle_language_uc", "lesson_subtitles", "lesson_id, language", "created_at DESC NULLS LAST, id DESC"),
+]
+
+
+def _existing(conn, query: str) -> set:
+    return {tuple(row) for row in conn.execute(text(query))}
+
+
+def run_migrations():
+    start = time.perf_counter()
+    DeclarativeBase.metadata.create_all(bind=engine)  # checks each table first
+
+    with engine.begin() as conn:
+        existing_columns = _existing(conn, """
+            SELECT table_name, column_name FROM information_schema.columns
+            WHERE table_schema = current_schema()
+        """)
+        existing_indexes = _existing(conn, "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+        existing_constraints = _existing(conn, """
+            SELECT conname FROM pg_constraint
+            WHERE connamespace = current_schema()::regnamespace
+        """)
+
+        applied = 0
+        for table, column, ddl in ADDED_COLUMNS:
+            if (table, column) not in existing_columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}"))
+                applied += 1
+        for name, table, columns in ADDED_INDEXES:
+            if (name,) not in existing_indexes:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+                applied += 1
+        for name, table, columns, keep in ADDED_UNIQUE_CONSTRAINTS:
+            if (name,) in existing_constraints:
+                continue
+            removed = conn.execute(text(f"""
+                DELETE FROM {table} t
+                USING (
+                    SELECT id, row_number() OVER (PARTITION BY {columns} ORDER BY {keep}) AS rank
+                    FROM {table}
+                ) d
+                WHERE t.id = d.id AND d.rank > 1
+            """)).rowcount
+            conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE ({columns})"))
+            print(f"🔧 Added {name} ({removed} duplicate rows removed from {table})")
+            applied += 1
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✅ Schema up to date ({len(DeclarativeBase.metadata.tables)} tables, "
+          f"{applied} migrations applied, {elapsed:.1f} ms)")
+
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# ==============================================================
+# Connection Pool Instrumentation
+# ==============================================================
+# Collects per-engine pool statistics (checkouts, in-use, overflow,
+# checkout wait time and timeouts) for the internal metrics endpoint.
+
+
+class PoolMetrics:
+    """Thread-safe counters for a single connection pool."""
+
+    def __init__(self, name: str, window: int = 1000):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)  # recent checkout wait times (seconds)
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.timeouts = 0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self._waits.append(seconds)
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connections_opened += 1
+
+    def on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def on_checkin(self, *args):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return waits[min(int(len(waits) * p), len(waits) - 1)]
+
+        pool = self.pool
+        return {
+            "pool": self.name,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else self.in_use,
+            "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "connections_opened": self.connections_opened,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "timeouts": self.timeouts,
+            "checkout_wait_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+                "p50": round(percentile(0.50) * 1000, 3),
+                "p95": round(percentile(0.95) * 1000, 3),
+                "max": round(self.wait_max * 1000, 3),
+            },
+        }
+
+
+# name -> PoolMetrics for every instrumented engine
+_registry = {}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times how long each checkout waits for a connection
+    and counts pool timeouts (exhaustion). Pool events cannot see the
+    wait itself, so it is measured around the pool's internal get.
+    """
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.record_timeout()
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        if self.metrics:
+            self.metrics.pool = new_pool
+        return new_pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Asyncio-compatible variant used by the async engine."""
+
+
+def instrument_engine(engine, name: str = "primary") -> PoolMetrics:
+    """
+    Attach pool event listeners to `engine` and register its metrics.
+    For an AsyncEngine pass `async_engine.sync_engine`.
+    """
+    metrics = PoolMetrics(name)
+    pool = engine.pool
+    metrics.pool = pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.metrics = metrics
+
+    event.listen(engine, "connect", metrics.on_connect)
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
+
+    _registry[name] = metrics
+    return metrics
+
+
+def get_pool_metrics() -> list:
+    """Return a metrics snapshot for every instrumented pool."""
+    return [m.snapshot() for m in _registry.values()]
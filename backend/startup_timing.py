@@ -0,0 +1,48 @@
+import time
+from contextlib import contextmanager
+
+# ==============================================================
+# Boot Phase Timing
+# ==============================================================
+# Records how long each phase of worker startup took (imports, schema,
+# app setup, ...) so slow boots / rolling restarts can be diagnosed.
+
+
+class BootTimer:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.total = None  # seconds, frozen by finish() once startup is done
+        self.phases = []  # [(name, seconds), ...] in execution order
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def finish(self):
+        """Freeze the total boot time (end of the lifespan startup)."""
+        if self.total is None:
+            self.total = time.perf_counter() - self.started_at
+
+    def report(self) -> dict:
+        # Until finish() is called the total is the time spent booting so far
+        total = self.total if self.total is not None else time.perf_counter() - self.started_at
+        return {
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+            "total_ms": round(total * 1000, 1),
+            "complete": self.total is not None,
+        }
+
+    def print_report(self):
+        report = self.report()
+        print("⏱️ Startup timing:")
+        for name, ms in report["phases_ms"].items():
+            print(f"   {name:<20} {ms:>10.1f} ms")
+        print(f"   {'total':<20} {report['total_ms']:>10.1f} ms")
+
+
+# One timer per worker process; created when this module is first imported.
+boot_timer = BootTimer()
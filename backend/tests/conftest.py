@@ -0,0 +1,21 @@
+import os
+import sys
+
+# Tests import the app modules the same way main.py does (from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py builds its engines (and lesson_crud its MinIO client) at import
+# time; give them well-formed settings so a clean checkout can run the tests.
+# Nothing connects: the tests use their own SQLite engines and no storage.
+for name, default in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "MINIO_ENDPOINT": "localhost:9000",
+    "MINIO_ACCESS_KEY": "test",
+    "MINIO_SECRET_KEY": "test",
+    "MINIO_COURSES_BUCKET": "test",
+}.items():
+    os.environ.setdefault(name, default)
@@ -0,0 +1,104 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.crud import chunked_transcription as ct
+
+RATE = ct.AUDIO_SAMPLE_RATE
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """1 s chunks, cuts searched within ±0.25 s, energy measured per 50 ms."""
+    monkeypatch.setattr(ct, "TRANSCRIPTION_CHUNK_SECONDS", 1.0)
+    monkeypatch.setattr(ct, "TRANSCRIPTION_SILENCE_WINDOW", 0.25)
+    monkeypatch.setattr(ct, "SILENCE_FRAME_SECONDS", 0.05)
+
+
+def _noise(seconds: float, silences=()):
+    """Loud noise with silent [start, end) second ranges."""
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(0.5, 1.0, int(seconds * RATE)).astype(np.float32)
+    for start, end in silences:
+        audio[int(start * RATE):int(end * RATE)] = 0
+    return audio
+
+
+def _pieces(audio, size=1000):
+    """Feed the audio the way stream_audio does: many small pieces."""
+    return (audio[i:i + size] for i in range(0, len(audio), size))
+
+
+def test_short_audio_is_not_cut():
+    audio = _noise(1.5)
+
+    cuts, total, whole = ct.find_cuts(_pieces(audio))
+
+    assert cuts == []
+    assert total == len(audio)
+    assert np.array_equal(whole, audio)
+
+
+def test_no_audio():
+    cuts, total, whole = ct.find_cuts(iter(()))
+
+    assert (cuts, total, len(whole)) == ([], 0, 0)
+
+
+def test_cuts_land_in_the_silence_near_each_boundary():
+    # One 50 ms silence inside the search window after each cut (aligned to its frames)
+    audio = _noise(3.2, silences=[(1.100, 1.150), (2.075, 2.125)])
+
+    cuts, total, whole = ct.find_cuts(_pieces(audio))
+
+    assert whole is None
+    assert total == len(audio)
+    assert cuts == [int(1.125 * RATE), int(2.1 * RATE)]
+    assert all(audio[cut] == 0 for cut in cuts)
+
+
+def test_cuts_stay_within_the_search_window():
+    audio = _noise(5.0)
+
+    cuts, _, _ = ct.find_cuts(_pieces(audio, size=777))
+
+    chunk, search = RATE, int(0.25 * RATE)
+    for previous, cut in zip([0] + cuts, cuts):
+        assert chunk - search <= cut - previous <= chunk + search
+    # The tail after the last cut is never more than 1.5 chunks
+    assert len(audio) - cuts[-1] <= int(1.5 * chunk) + search
+
+
+def test_transcribe_chunk_keeps_segments_centred_in_its_core(monkeypatch):
+    class Model:
+        def transcribe(self, audio, language):
+            # Chunk-relative times; the chunk starts at 9 s on the lesson timeline
+            return {"segments": [
+                {"start": 0.0, "end": 0.8, "text": "overlap before"},   # centre 9.4 s
+                {"start": 1.6, "end": 2.6, "text": "on the boundary"},  # centre 11.1 s
+                {"start": 11.5, "end": 12.5, "text": "overlap after"},  # centre 21.0 s
+            ]}
+
+    monkeypatch.setattr(ct, "extract_audio", lambda source, start, duration: None)
+    monkeypatch.setattr(ct, "media_source", lambda path: path)
+    monkeypatch.setattr(ct, "get_whisper_model", lambda: Model())
+
+    segments = ct.transcribe_chunk("lesson.mp4", 9.0, 21.0, 10.0, 20.0)
+
+    assert segments == [{"start": 10.6, "end": 11.6, "text": "on the boundary"}]
+
+
+def test_stitch_chunks_numbers_segments_and_removes_overlap():
+    chunks = [
+        [{"start": 0.0, "end": 4.0, "text": "a"}, {"start": 4.0, "end": 10.2, "text": "b"}],
+        [],
+        [{"start": 10.0, "end": 12.0, "text": "c"}, {"start": 12.5, "end": 13.0, "text": "d"}],
+    ]
+
+    segments = ct.stitch_chunks(chunks)
+
+    assert [s["id"] for s in segments] == [0, 1, 2, 3]
+    assert [s["text"] for s in segments] == ["a", "b", "c", "d"]
+    assert segments[2]["start"] == 10.2  # starts where the previous chunk's last segment ended
+    for previous, current in zip(segments, segments[1:]):
+        assert current["start"] >= previous["end"]
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base as DeclarativeBase
+from Base import User, UserRole, Course, LearnerProgress, LearnerProgressHistory
+from app.crud.dashboard_crud import get_progress_series, _month_starts, _next_month
+
+MONTHS = 6
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    tables = [t.__table__ for t in (User, Course, LearnerProgress, LearnerProgressHistory)]
+    DeclarativeBase.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _at(month_index: int, day: int = 10) -> datetime:
+    """A time inside the `month_index`-th month of the chart window (0 = oldest)."""
+    return _month_starts(MONTHS, datetime.utcnow())[month_index] + timedelta(days=day - 1)
+
+
+def _seed(db):
+    """Two learners with several courses each, updated in different months."""
+    db.add_all([
+        User(id=1, first_name="Ana", email="ana@example.com", role=UserRole.student),
+        User(id=2, first_name="Ben", email="ben@example.com", role=UserRole.student),
+        User(id=3, first_name="Mia", email="mia@example.com", role=UserRole.mentor),
+        Course(id=10, title="Python"),
+        Course(id=11, title="SQL"),
+        Course(id=12, title="Docker"),
+    ])
+
+    updates = [
+        # learner, course, month, value
+        (1, 10, 0, 20.0),
+        (1, 11, 1, 40.0),
+        (1, 10, 2, 60.0),
+        (1, 12, 2, 10.0),
+        (1, 11, 4, 90.0),
+        (2, 10, 1, 50.0),
+        (2, 11, 1, 30.0),
+        (2, 10, 5, 100.0),
+    ]
+    latest = {}
+    for learner_id, course_id, month, value in updates:
+        db.add(LearnerProgressHistory(
+            learner_id=learner_id, course_id=course_id, progress_percent=value, recorded_at=_at(month),
+        ))
+        latest[(learner_id, course_id)] = (value, _at(month))
+
+    for (learner_id, course_id), (value, when) in latest.items():
+        db.add(LearnerProgress(
+            learner_id=learner_id, course_id=course_id, progress_percent=value, updated_at=when,
+        ))
+
+    # Course progress written before history was recorded: no history rows
+    db.add(LearnerProgress(learner_id=2, course_id=12, progress_percent=70.0, updated_at=_at(3)))
+    db.commit()
+
+
+def _reference_series(db, learner_id: int) -> list:
+    """Straightforward loop: per month, average each course's latest value so far."""
+    history = db.query(LearnerProgressHistory).filter(LearnerProgressHistory.learner_id == learner_id).all()
+    current = db.query(LearnerProgress).filter(LearnerProgress.learner_id == learner_id).all()
+    with_history = {h.course_id for h in history}
+    points = [(h.course_id, h.recorded_at, h.progress_percent) for h in history]
+    points += [(p.course_id, p.updated_at, p.progress_percent) for p in current if p.course_id not in with_history]
+
+    series = []
+    for start in _month_starts(MONTHS, datetime.utcnow()):
+        end = _next_month(start)
+        latest = {}
+        for course_id, when, value in sorted(points, key=lambda p: p[1]):
+            if when < end:
+                latest[course_id] = value
+        series.append(round(sum(latest.values()) / len(latest), 2) if latest else 0.0)
+    return series
+
+
+def test_progress_series_matches_reference_loop(db):
+    _seed(db)
+
+    series = get_progress_series(db, top=10, months=MONTHS)
+
+    assert [l["id"] for l in series["learners"]] == [2, 1]  # students only, by average progress
+    for learner, values in zip(series["learners"], series["progress"]):
+        assert values == _reference_series(db, learner["id"])
+
+
+def test_progress_series_carries_courses_forward(db):
+    _seed(db)
+
+    series = get_progress_series(db, top=10, months=MONTHS)
+    by_id = dict(zip([l["id"] for l in series["learners"]], series["progress"]))
+
+    # A later update to one course never drops the learner's other courses
+    assert by_id[1] == [20.0, 30.0, 36.67, 36.67, 53.33, 53.33]
+    assert by_id[2] == [0.0, 40.0, 40.0, 50.0, 50.0, 66.67]
+
+
+def test_progress_series_top_limit(db):
+    _seed(db)
+
+    series = get_progress_series(db, top=1, months=MONTHS)
+
+    assert [l["key"] for l in series["learners"]] == ["ben"]
+    assert len(series["progress"]) == 1
+    assert len(series["progress"][0]) == len(series["months"]) == MONTHS
+
+
+def test_progress_series_uses_last_value_before_window_and_per_month(db):
+    _seed(db)
+    before_window = _at(0) - timedelta(days=60)
+    db.add_all([
+        # Older values: only the latest one before the window is carried in
+        LearnerProgressHistory(learner_id=2, course_id=11, progress_percent=5.0,
+                               recorded_at=before_window - timedelta(days=90)),
+        LearnerProgressHistory(learner_id=2, course_id=11, progress_percent=10.0, recorded_at=before_window),
+        # Two updates in the same month: the later one wins
+        LearnerProgressHistory(learner_id=1, course_id=10, progress_percent=25.0, recorded_at=_at(0, day=12)),
+        LearnerProgressHistory(learner_id=1, course_id=10, progress_percent=22.0, recorded_at=_at(0, day=14)),
+    ])
+    db.commit()
+
+    series = get_progress_series(db, top=10, months=MONTHS)
+    by_id = dict(zip([l["id"] for l in series["learners"]], series["progress"]))
+
+    assert by_id[1][0] == 22.0
+    assert by_id[2][0] == 10.0
+    for learner_id, values in by_id.items():
+        assert values == _reference_series(db, learner_id)
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from app.crud import grading_engine as ge
+from app.crud.grading_engine import GradingEngine, TokenBucket, is_retryable
+
+
+class ApiError(Exception):
+    """Shaped like google.api_core errors: HTTP status in `code`."""
+
+    def __init__(self, code: int, message: str = ""):
+        super().__init__(message)
+        self.code = code
+
+
+class ScriptedGrader:
+    """Raises the scripted errors in order, then answers."""
+
+    name = "scripted"
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "Score: 85/100 - solid work"
+
+
+def _engine(grader, max_retries=3):
+    return GradingEngine(grader=grader, rpm=60_000, burst=100, max_retries=max_retries, backoff=0)
+
+
+# =========================================================
+# 🪣 TokenBucket
+# =========================================================
+def test_bucket_allows_a_burst_without_waiting():
+    bucket = TokenBucket(rate_per_minute=60, burst=3)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_bucket_waits_for_the_refill_once_empty():
+    bucket = TokenBucket(rate_per_minute=600, burst=1)  # one token per 0.1 s
+    bucket.acquire()
+
+    start = time.monotonic()
+    waited = bucket.acquire()
+
+    assert 0.05 <= waited <= 0.2
+    assert time.monotonic() - start == pytest.approx(waited, abs=0.05)
+
+
+def test_bucket_never_holds_more_than_the_burst():
+    bucket = TokenBucket(rate_per_minute=60_000, burst=2)
+    time.sleep(0.05)  # would refill ~50 tokens without the cap
+
+    bucket.acquire()
+    bucket.acquire()
+
+    assert bucket.tokens < 1
+
+
+# =========================================================
+# 🔁 Retry policy
+# =========================================================
+@pytest.mark.parametrize("error", [
+    ApiError(429, "Resource exhausted"),
+    ApiError(500), ApiError(503), ApiError(504),
+    TimeoutError("read timed out"),
+    ConnectionError("reset by peer"),
+    ge.StubRateLimited("simulated"),
+])
+def test_transient_errors_are_retryable(error):
+    assert is_retryable(error)
+
+
+@pytest.mark.parametrize("error", [
+    ApiError(400, "Invalid argument"),
+    ApiError(401), ApiError(403), ApiError(404),
+    ValueError("response was blocked"),
+    RuntimeError("boom"),
+])
+def test_permanent_errors_are_not_retryable(error):
+    assert not is_retryable(error)
+
+
+def test_grade_retries_transient_errors_until_success():
+    grader = ScriptedGrader(ApiError(429), TimeoutError())
+    engine = _engine(grader)
+
+    result = engine.grade({"id": 7, "prompt": "p"})
+
+    assert (result["id"], result["score"], result["error"], result["attempts"]) == (7, 85, None, 3)
+    assert engine.stats()["retries"] == 2
+
+
+@pytest.mark.parametrize("error", [ApiError(401, "API key not valid"), ValueError("response was blocked")])
+def test_grade_fails_permanent_errors_on_the_first_attempt(error):
+    grader = ScriptedGrader(error)
+    engine = _engine(grader)
+
+    result = engine.grade({"id": 1, "prompt": "p"})
+
+    assert grader.calls == 1
+    assert result["score"] is None
+    assert result["error"] == str(error)
+    assert result["attempts"] == 1
+
+
+def test_grade_gives_up_after_max_retries():
+    grader = ScriptedGrader(*[ApiError(503, "unavailable")] * 5)
+    engine = _engine(grader, max_retries=2)
+
+    result = engine.grade({"id": 1, "prompt": "p"})
+
+    assert grader.calls == 3
+    assert result["error"] == "unavailable"
+    assert engine.stats()["failed"] == 1
+
+
+def test_error_without_message_reports_its_type():
+    result = _engine(ScriptedGrader(TimeoutError()), max_retries=0).grade({"id": 1, "prompt": "p"})
+
+    assert result["error"] == "TimeoutError"
+
+
+def test_grade_many_keeps_job_order():
+    engine = _engine(ScriptedGrader())
+
+    results = engine.grade_many([{"id": i, "prompt": str(i)} for i in range(10)])
+
+    assert [r["id"] for r in results] == list(range(10))
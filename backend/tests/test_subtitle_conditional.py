@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("minio")
+
+from starlette.requests import Request
+
+from app.crud.subtitle_cache import RenderedSubtitleCache
+from app.routers.lesson_router import _not_modified
+
+ETAG = '"12-1760000000-vtt"'
+MODIFIED = datetime(2025, 10, 9, 8, 53, 20, tzinfo=timezone.utc)
+
+
+def _request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+# =========================================================
+# ♻️ Conditional GET
+# =========================================================
+@pytest.mark.parametrize("if_none_match", [
+    ETAG,
+    f"W/{ETAG}",
+    f'"other", {ETAG}',
+    "*",
+])
+def test_matching_etag_is_not_modified(if_none_match):
+    assert _not_modified(_request(if_none_match=if_none_match), ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize("if_none_match", ['"12-1760000000-srt"', '"13-1760000000-vtt"', '"other", "another"'])
+def test_different_etag_is_modified(if_none_match):
+    assert not _not_modified(_request(if_none_match=if_none_match), ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize("if_modified_since, expected", [
+    ("Thu, 09 Oct 2025 08:53:20 GMT", True),   # same second
+    ("Fri, 10 Oct 2025 00:00:00 GMT", True),   # newer copy
+    ("Thu, 09 Oct 2025 08:53:19 GMT", False),  # older copy
+    ("not a date", False),
+])
+def test_if_modified_since(if_modified_since, expected):
+    assert _not_modified(_request(if_modified_since=if_modified_since), ETAG, MODIFIED) is expected
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request = _request(if_none_match='"stale"', if_modified_since="Fri, 10 Oct 2025 00:00:00 GMT")
+
+    assert not _not_modified(request, ETAG, MODIFIED)
+
+
+def test_unconditional_request_is_modified():
+    assert not _not_modified(_request(), ETAG, MODIFIED)
+
+
+# =========================================================
+# 🗃️ Rendered subtitle cache
+# =========================================================
+def test_cache_evicts_least_recently_served_within_budget():
+    cache = RenderedSubtitleCache(max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("aaaa", None, "cccc")
+
+
+def test_cache_skips_documents_over_budget():
+    cache = RenderedSubtitleCache(max_bytes=3)
+    cache.put("big", "x" * 4)
+
+    assert cache.get("big") is None
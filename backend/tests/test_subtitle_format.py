@@ -0,0 +1,61 @@
+import json
+
+from app.crud.subtitle_format import (
+    format_timestamp, parse_timestamp, segments_to_vtt, segments_to_srt, segments_to_json, vtt_to_segments,
+)
+
+SEGMENTS = [
+    {"start": 0.0, "end": 1.5, "text": " Hello there. "},
+    {"start": 1.5, "end": 3661.25, "text": "Two lines\n\nwith a blank one"},
+]
+
+
+def test_format_timestamp_rounds_and_carries():
+    assert format_timestamp(0) == "00:00:00.000"
+    assert format_timestamp(3661.25) == "01:01:01.250"
+    assert format_timestamp(59.9996) == "00:01:00.000"
+    assert format_timestamp(1.2, ",") == "00:00:01,200"
+    assert format_timestamp(-0.5) == "00:00:00.000"
+
+
+def test_parse_timestamp_accepts_vtt_short_and_srt_forms():
+    assert parse_timestamp("01:02:03.250") == 3723.25
+    assert parse_timestamp("02:03.500") == 123.5
+    assert parse_timestamp("00:00:01,200") == 1.2
+
+
+def test_vtt_document():
+    assert segments_to_vtt(SEGMENTS) == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:01.500\nHello there.\n\n"
+        "00:00:01.500 --> 01:01:01.250\nTwo lines\nwith a blank one\n\n"
+    )
+
+
+def test_srt_document_numbers_cues():
+    assert segments_to_srt(SEGMENTS) == (
+        "1\n00:00:00,000 --> 00:00:01,500\nHello there.\n\n"
+        "2\n00:00:01,500 --> 01:01:01,250\nTwo lines\nwith a blank one\n\n"
+    )
+
+
+def test_json_cues():
+    assert json.loads(segments_to_json([{"start": 0.12345, "end": 1.0, "text": "Olá"}])) == [
+        {"start": 0.123, "end": 1.0, "text": "Olá"}
+    ]
+    assert "Olá" in segments_to_json([{"start": 0, "end": 1, "text": "Olá"}])
+
+
+def test_vtt_and_srt_parse_back_to_segments():
+    expected = [
+        {"start": 0.0, "end": 1.5, "text": "Hello there."},
+        {"start": 1.5, "end": 3661.25, "text": "Two lines\nwith a blank one"},
+    ]
+    assert vtt_to_segments(segments_to_vtt(SEGMENTS)) == expected
+    assert vtt_to_segments(segments_to_srt(SEGMENTS)) == expected
+    assert vtt_to_segments(segments_to_vtt(SEGMENTS).replace("\n", "\r\n")) == expected
+
+
+def test_cue_settings_are_ignored_when_parsing():
+    vtt = "WEBVTT\n\n00:01.000 --> 00:02.000 align:start position:10%\nHi\n\n"
+    assert vtt_to_segments(vtt) == [{"start": 1.0, "end": 2.0, "text": "Hi"}]
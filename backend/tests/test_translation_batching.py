@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("requests")
+
+from app.crud import translate_crud as tc
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(tc, "TRANSLATION_BATCH_SIZE", 3)
+    monkeypatch.setattr(tc, "TRANSLATION_BATCH_CHARS", 10)
+
+
+@pytest.fixture
+def size_limit(monkeypatch):
+    monkeypatch.setattr(tc, "TRANSLATION_BATCH_SIZE", 3)
+    monkeypatch.setattr(tc, "TRANSLATION_BATCH_CHARS", 1000)
+
+
+def test_batches_respect_size_and_character_limits(limits):
+    texts = ["aa", "bb", "cc", "dd", "eeeeeeeee", "f", "g"]
+
+    batches = list(tc._batches(texts))
+
+    assert batches == [(0, 3), (3, 4), (4, 6), (6, 7)]
+    # Contiguous and complete
+    assert [i for start, end in batches for i in range(start, end)] == list(range(len(texts)))
+
+
+def test_oversized_text_gets_a_batch_of_its_own(limits):
+    assert list(tc._batches(["x" * 50, "y", "z" * 50])) == [(0, 1), (1, 2), (2, 3)]
+    assert list(tc._batches([])) == []
+
+
+def test_translate_batch_keeps_input_order(size_limit, monkeypatch):
+    requests = []
+    stored = {}
+
+    def request(chunk, target_lang):
+        requests.append(list(chunk))
+        return [f"{text.upper()}-{target_lang}" for text in chunk]
+
+    monkeypatch.setattr(tc, "lookup_translations", lambda texts, lang: {"cached": "from memory"})
+    monkeypatch.setattr(tc, "store_translations", lambda fresh, lang: stored.update(fresh))
+    monkeypatch.setattr(tc, "_request_translations", request)
+    progress = []
+
+    texts = ["one", "two", "cached", "one", "  three\n", "", "four", "five", "two"]
+    result = tc.translate_batch(texts, "fr", on_progress=lambda done, total: progress.append((done, total)))
+
+    assert result == [
+        "ONE-fr", "TWO-fr", "from memory", "ONE-fr", "THREE-fr", "", "FOUR-fr", "FIVE-fr", "TWO-fr",
+    ]
+    # Memory hits, blanks and repeats are never sent; everything else once, in order
+    assert requests == [["one", "two", "three"], ["four", "five"]]
+    assert stored == {"one": "ONE-fr", "two": "TWO-fr", "three": "THREE-fr", "four": "FOUR-fr", "five": "FIVE-fr"}
+    assert progress == [(3, 5), (5, 5)]
+
+
+def test_translate_batch_stores_finished_batches_before_failing(size_limit, monkeypatch):
+    stored = {}
+
+    def request(chunk, target_lang):
+        if "four" in chunk:
+            raise tc.TranslationError("API down")
+        return [text.upper() for text in chunk]
+
+    monkeypatch.setattr(tc, "lookup_translations", lambda texts, lang: {})
+    monkeypatch.setattr(tc, "store_translations", lambda fresh, lang: stored.update(fresh))
+    monkeypatch.setattr(tc, "_request_translations", request)
+
+    with pytest.raises(tc.TranslationError):
+        tc.translate_batch(["one", "two", "three", "four"], "fr")
+
+    assert stored == {"one": "ONE", "two": "TWO", "three": "THREE"}
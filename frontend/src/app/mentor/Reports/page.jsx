@@ -1,6 +1,7 @@
 "use client";
 
 import React, { useEffect, useState, useRef } from "react";
+import { apiFetch } from "@/lib/api";
 
 
 export default function ReportsCertificates() {
@@ -60,11 +61,11 @@ export default function ReportsCertificates() {
       try {
         if (!process.env.NEXT_PUBLIC_API_URL) throw new Error("no api url");
 
-        const resL = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/learners`, {
+        const resL = await apiFetch(`${process.env.NEXT_PUBLIC_API_URL}/learners`, {
           headers: { "x-api-key": process.env.NEXT_PUBLIC_API_KEY }
         });
 
-        const resB = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/batches`, {
+        const resB = await apiFetch(`${process.env.NEXT_PUBLIC_API_URL}/batches`, {
           headers: { "x-api-key": process.env.NEXT_PUBLIC_API_KEY }
         });
 
@@ -126,7 +127,7 @@ export default function ReportsCertificates() {
   async function approveCertificate(id) {
     setLearners(prev => prev.map(l => (l.id === id ? { ...l, certificateStatus: "signed" } : l)));
     try {
-      await fetch(`${process.env.NEXT_PUBLIC_API_URL}/learners/${id}/approve`, { method: "POST", headers: { "x-api-key": process.env.NEXT_PUBLIC_API_KEY } });
+      await apiFetch(`${process.env.NEXT_PUBLIC_API_URL}/learners/${id}/approve`, { method: "POST", headers: { "x-api-key": process.env.NEXT_PUBLIC_API_KEY } });
     } catch (err) {
       // ignore for sample fallback
     }
@@ -135,7 +136,7 @@ export default function ReportsCertificates() {
   async function rejectCertificate(id) {
     setLearners(prev => prev.map(l => (l.id === id ? { ...l, certificateStatus: "rejected" } : l)));
     try {
-      await fetch(`${process.env.NEXT_PUBLIC_API_URL}/learners/${id}/reject`, { method: "POST", headers: { "x-api-key": process.env.NEXT_PUBLIC_API_KEY } });
+      await apiFetch(`${process.env.NEXT_PUBLIC_API_URL}/learners/${id}/reject`, { method: "POST", headers: { "x-api-key": process.env.NEXT_PUBLIC_API_KEY } });
     } catch (err) {
       // ignore for sample fallback
     }
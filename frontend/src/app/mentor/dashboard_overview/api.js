@@ -3,6 +3,8 @@
  * It uses real backend data if available, otherwise falls back to dynamic mock data.
  */
 
+import { apiFetch } from "@/lib/api";
+
 // --- Dynamic Mock Data Generation ---
 function generateDynamicMockData() {
   const baseStudents = [
@@ -93,8 +95,8 @@ const mockData = generateDynamicMockData();
 export async function getDashboardData() {
   try {
     const [dashboardRes, insightsRes] = await Promise.all([
-      fetch("http://localhost:8000/mentor/dashboard"),
-      fetch("http://localhost:8000/mentor/dashboard/insights")
+      apiFetch("http://localhost:8000/mentor/dashboard"),
+      apiFetch("http://localhost:8000/mentor/dashboard/insights")
     ]);
 
     if (!dashboardRes.ok || !insightsRes.ok)
@@ -16,6 +16,7 @@ import {
   LineChart,
   Line,
 } from "recharts";
+import { apiFetch } from "@/lib/api";
 
 /* ========= UTILS FOR RANDOM COLOR ASSIGNMENT (START) ========= */
 
@@ -50,7 +51,7 @@ const getAvatarColor = (studentId) => {
 const exponentialBackoffFetch = async (url, options = {}, retries = 3) => {
     for (let i = 0; i < retries; i++) {
         try {
-            const res = await fetch(url, options);
+            const res = await apiFetch(url, options);
             if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
             return res.json();
         } catch (error) {
@@ -0,0 +1,49 @@
+/**
+ * fetch() wrapper for backend calls: keeps reads consistent with the
+ * user's own writes when the backend reads from a replica.
+ *
+ * A successful write returns an `X-Last-Write` header (write time, in
+ * seconds). Echoing it on the following requests keeps those reads on the
+ * primary database until the replica has caught up, so a page never shows
+ * data older than what the user just saved. The value is kept in
+ * sessionStorage so it survives full page navigations.
+ */
+
+const LAST_WRITE_HEADER = "X-Last-Write";
+const STORAGE_KEY = "api.lastWrite";
+
+// Stop echoing the marker after this long (the backend window is a few seconds)
+const LAST_WRITE_TTL_MS = 60 * 1000;
+
+let lastWrite = null;
+
+function getLastWrite() {
+  if (lastWrite === null && typeof window !== "undefined") {
+    lastWrite = window.sessionStorage.getItem(STORAGE_KEY);
+  }
+  if (!lastWrite || Date.now() - parseFloat(lastWrite) * 1000 > LAST_WRITE_TTL_MS) {
+    return null;
+  }
+  return lastWrite;
+}
+
+function setLastWrite(value) {
+  lastWrite = value;
+  if (typeof window !== "undefined") {
+    window.sessionStorage.setItem(STORAGE_KEY, value);
+  }
+}
+
+export async function apiFetch(url, options = {}) {
+  const headers = new Headers(options.headers || {});
+  const marker = getLastWrite();
+  if (marker && !headers.has(LAST_WRITE_HEADER)) {
+    headers.set(LAST_WRITE_HEADER, marker);
+  }
+
+  const res = await fetch(url, { ...options, headers });
+
+  const written = res.headers.get(LAST_WRITE_HEADER);
+  if (written) setLastWrite(written);
+  return res;
+}